@@ -2,7 +2,7 @@
 from .alert_explanation import generate_alert_explanation
 from .timeline_builder import build_timeline
 from .next_step_advisor import recommend_next_steps
-from .report_writer import write_investigation_report, report_to_markdown, generate_regulatory_report
+from .report_writer import write_investigation_report, report_to_markdown, generate_regulatory_report, is_llm_required_report
 
 __all__ = [
     "generate_alert_explanation",
@@ -11,4 +11,5 @@ __all__ = [
     "write_investigation_report",
     "report_to_markdown",
     "generate_regulatory_report",
+    "is_llm_required_report",
 ]
@@ -119,7 +119,8 @@ def recommend_next_steps(
         use_llm: If True and API key set, use LLM; else use rule-based suggestions.
 
     Returns:
-        dict with keys: next_steps (list of 3 strings), rationale (string).
+        dict with keys: next_steps (list of 3 strings), rationale (string). When use_llm=True and the
+        LLM is unavailable or its reply is unusable, also error (string) and next_steps holds the message.
     """
     indicators_block = _format_indicators(risk_indicators)
     prompt = USER_PROMPT_TEMPLATE.format(indicators_block=indicators_block)
@@ -130,6 +131,7 @@ def recommend_next_steps(
             return {
                 "next_steps": [err],
                 "rationale": "Fix the issue above (e.g. set GOOGLE_API_KEY or OPENAI_API_KEY in .env, or check key validity and network).",
+                "error": err,
             }
         if raw:
             text = raw.strip()
@@ -145,9 +147,11 @@ def recommend_next_steps(
                     return out
             except json.JSONDecodeError:
                 pass
+        msg = "Set GOOGLE_API_KEY or OPENAI_API_KEY in .env to generate AI recommendations."
         return {
-            "next_steps": ["Set GOOGLE_API_KEY or OPENAI_API_KEY in .env to generate AI recommendations."],
+            "next_steps": [msg],
             "rationale": "LLM is required for next-step suggestions.",
+            "error": msg,
         }
 
     return _template_next_steps(risk_indicators)
@@ -258,6 +258,9 @@ def generate_regulatory_report(case_context_data: str, *, use_llm: bool = True)
     return _regulatory_report_fallback(case_context_data)
 
 
+_LLM_REQUIRED_NOTE = "LLM is required for report generation."
+
+
 def _llm_required_report_message(error_detail: str = "") -> str:
     """When use_llm=True but LLM is unavailable or failed; show error_detail if provided."""
     msg = error_detail or "Set GOOGLE_API_KEY or OPENAI_API_KEY in .env to generate this report."
@@ -267,16 +270,21 @@ def _llm_required_report_message(error_detail: str = "") -> str:
 {msg}
 
 ## 2. Evidence Reviewed
-LLM is required for report generation.
+{_LLM_REQUIRED_NOTE}
 
 ## 3. Findings
-LLM is required for report generation.
+{_LLM_REQUIRED_NOTE}
 
 ## 4. Conclusion & Recommendations
-LLM is required for report generation.
+{_LLM_REQUIRED_NOTE}
 """
 
 
+def is_llm_required_report(report_md: str) -> bool:
+    """True if report_md is the placeholder generate_regulatory_report returns when the LLM failed or is unavailable."""
+    return report_md.endswith(f"## 4. Conclusion & Recommendations\n{_LLM_REQUIRED_NOTE}\n")
+
+
 def _regulatory_report_fallback(case_context_data: str) -> str:
     """Template fallback only when use_llm=False (e.g. CLI)."""
     return _llm_required_report_message()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Precompute the CSV-mode network graph (get_account_network) of every account into
+backend/data/subgraphs.parquet, so the dashboard serves it with one dict lookup instead of
+loading the device/IP mappings and walking them per query.
+
+One row per account: account_id, graph (the {nodes, edges} dict as JSON). The file is tagged with
+the source CSVs' mtimes and ignored by the service once either CSV changes; re-run to refresh.
+
+Usage:
+  python backend/scripts/build_subgraph_index.py
+  (from project root: python -m backend.scripts.build_subgraph_index)
+"""
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Add project root to path (backend.services imports itself by absolute package name)
+ROOT = Path(__file__).resolve().parent.parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.services import network  # noqa: E402
+
+
+def main() -> None:
+    key = (network._mtime_ns(network.UNLABELED_CSV), network._mtime_ns(network.SYNTHETIC_CSV))
+    names, _, account_devices_ips, _, _ = network.build_indices()
+    account_ids = sorted(names[a] for a in account_devices_ips)
+    print(f"Building subgraphs for {len(account_ids):,} accounts...")
+    graphs = [
+        json.dumps(network.build_account_network_csv(acc), separators=(",", ":"))
+        for acc in account_ids
+    ]
+    table = pa.table({"account_id": account_ids, "graph": graphs})
+    table = table.replace_schema_metadata({b"source_mtimes": f"{key[0]}:{key[1]}".encode()})
+    pq.write_table(table, network.SUBGRAPH_INDEX, use_dictionary=["account_id"], compression="zstd")
+    print(f"Saved {network.SUBGRAPH_INDEX}")
+
+
+if __name__ == "__main__":
+    main()
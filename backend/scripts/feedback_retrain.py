@@ -2,7 +2,7 @@
 """
 Continuous learning: build a training dataset from investigator feedback and optionally retrain.
 
-1. Load decisions from backend/data/investigator_feedback.json (via feedback service).
+1. Load decisions from backend/data/investigator_feedback.jsonl (via feedback service).
 2. Join with backend/data/anomaly_scores.csv to get features for each account_id.
 3. Export backend/data/feedback_training_data.csv (features + label) for retraining.
 4. Optionally run a retrain step (e.g. combine with existing synthetic data and retrain classifier).
@@ -51,16 +51,14 @@ def create_constraints(driver) -> None:
                     print(f"Constraint note: {e}")
 
 
-def _safe(s) -> str | None:
-    if s is None:
-        return None
-    try:
-        if pd.isna(s):
-            return None
-    except Exception:
-        pass
-    s = str(s).strip()
-    return s if s else None
+# Rows per UNWIND batch sent to Neo4j
+BATCH_SIZE = 5000
+
+
+def _unwind(session, query: str, rows: list[dict]) -> None:
+    """Run an UNWIND $rows query in fixed-size batches."""
+    for start in range(0, len(rows), BATCH_SIZE):
+        session.run(query, rows=rows[start : start + BATCH_SIZE]).consume()
 
 
 def load_csv_into_graph(driver, csv_path: Path, account_col: str, device_col: str, ip_col: str) -> int:
@@ -68,37 +66,47 @@ def load_csv_into_graph(driver, csv_path: Path, account_col: str, device_col: st
     if not csv_path.exists():
         print(f"Skip (not found): {csv_path}")
         return 0
-    df = pd.read_csv(csv_path)
-    if account_col not in df.columns or device_col not in df.columns or ip_col not in df.columns:
+    try:
+        df = pd.read_csv(csv_path, engine="pyarrow", usecols=[account_col, device_col, ip_col])
+    except (ValueError, KeyError):
+        # Missing usecols: ValueError from the C engine, pyarrow's ArrowKeyError (a KeyError) from this one
         print(f"Skip (missing columns): {csv_path}")
         return 0
-    count = 0
+    df = df.rename(columns={account_col: "aid", device_col: "did", ip_col: "iid"})
+    for c in ("aid", "did", "iid"):
+        df[c] = df[c].astype("string").str.strip().fillna("")
+    df = df[(df["aid"] != "") & ((df["did"] != "") | (df["iid"] != ""))]
+    count = len(df)
+
+    # MERGE each node and edge once: O(unique nodes + unique edges) instead of O(rows)
+    devs = df.loc[df["did"] != "", ["aid", "did"]]
+    ips = df.loc[df["iid"] != "", ["aid", "iid"]]
     with driver.session() as session:
-        for _, row in df.iterrows():
-            acc = _safe(row.get(account_col))
-            dev = _safe(row.get(device_col))
-            ip = _safe(row.get(ip_col))
-            if not acc or (not dev and not ip):
-                continue
-            session.run(
-                "MERGE (a:Account {account_id: $aid})",
-                aid=acc,
-            )
-            if dev:
-                session.run("MERGE (d:Device {device_id: $did})", did=dev)
-                session.run(
-                    "MATCH (a:Account {account_id: $aid}) MATCH (d:Device {device_id: $did}) MERGE (a)-[:USES_DEVICE]->(d)",
-                    aid=acc,
-                    did=dev,
-                )
-            if ip:
-                session.run("MERGE (i:IP {ip_id: $iid})", iid=ip)
-                session.run(
-                    "MATCH (a:Account {account_id: $aid}) MATCH (i:IP {ip_id: $iid}) MERGE (a)-[:LOGGED_FROM]->(i)",
-                    aid=acc,
-                    iid=ip,
-                )
-            count += 1
+        _unwind(
+            session,
+            "UNWIND $rows AS r MERGE (:Account {account_id: r.aid})",
+            df[["aid"]].drop_duplicates().to_dict("records"),
+        )
+        _unwind(
+            session,
+            "UNWIND $rows AS r MERGE (:Device {device_id: r.did})",
+            devs[["did"]].drop_duplicates().to_dict("records"),
+        )
+        _unwind(
+            session,
+            "UNWIND $rows AS r MERGE (:IP {ip_id: r.iid})",
+            ips[["iid"]].drop_duplicates().to_dict("records"),
+        )
+        _unwind(
+            session,
+            "UNWIND $rows AS r MATCH (a:Account {account_id: r.aid}) MATCH (d:Device {device_id: r.did}) MERGE (a)-[:USES_DEVICE]->(d)",
+            devs.drop_duplicates().to_dict("records"),
+        )
+        _unwind(
+            session,
+            "UNWIND $rows AS r MATCH (a:Account {account_id: r.aid}) MATCH (i:IP {ip_id: r.iid}) MERGE (a)-[:LOGGED_FROM]->(i)",
+            ips.drop_duplicates().to_dict("records"),
+        )
     print(f"Loaded {count} rows from {csv_path.name}")
     return count
 
@@ -21,35 +21,58 @@ from sklearn.metrics import (
     confusion_matrix,
     roc_auc_score,
     average_precision_score,
-    f1_score,
 )
 
+# Optional: FastTreeSHAP v2 precomputes per-tree summands once and reuses them across rows
+# (drop-in TreeExplainer API). Falls back to stock shap when not installed.
+try:
+    import fasttreeshap
+    HAS_FASTTREESHAP = True
+except ImportError:
+    HAS_FASTTREESHAP = False
+
+# Optional: compile the trained booster to a native predictor (treelite + tl2cgen, needs a C toolchain).
+# Falls back to Booster.predict when not installed or compilation fails.
+try:
+    import treelite
+    import tl2cgen
+    HAS_TREELITE = True
+except ImportError:
+    HAS_TREELITE = False
+
 RANDOM_SEED = 42
 DATA_PATH = Path(__file__).resolve().parent.parent / "data" / "synthetic_fraud_dataset.csv"
 MODEL_DIR = Path(__file__).resolve().parent.parent / "models"
 MODEL_PATH = MODEL_DIR / "fraud_classifier.txt"
 CONFIG_PATH = MODEL_DIR / "config.json"
+LIB_PATH = MODEL_DIR / "fraud_classifier.so"
 
 
-def load_and_prepare(data_path: Path) -> tuple[pd.DataFrame, pd.Series, list[str]]:
-    """Load CSV, derive features, return X, y, feature_names."""
-    df = pd.read_csv(data_path)
+def _group_sizes(col: pd.Series) -> np.ndarray:
+    """Per-row size of the row's group (how many rows share this value)."""
+    codes, uniques = pd.factorize(col, use_na_sentinel=False)
+    return np.bincount(codes, minlength=len(uniques))[codes]
 
-    # Target
-    y = (df["is_fraud"] == True).astype(int)  # 1 = fraud, 0 = legit
 
-    # Shared device/IP counts (interpretable proxy for "same device/IP")
-    device_counts = df["device_id"].map(df["device_id"].value_counts())
-    ip_counts = df["ip_hash"].map(df["ip_hash"].value_counts())
-    df = df.assign(
-        device_shared_count=device_counts.values,
-        ip_shared_count=ip_counts.values,
+def derive_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Add device_shared_count, ip_shared_count and deposits_vs_income_ratio to the raw CSV frame."""
+    return df.assign(
+        # Shared device/IP counts (interpretable proxy for "same device/IP")
+        device_shared_count=_group_sizes(df["device_id"]),
+        ip_shared_count=_group_sizes(df["ip_hash"]),
+        # Ratio: 90d deposits vs quarter of declared income (high => income mismatch)
+        deposits_vs_income_ratio=df["total_deposits_90d"] / (df["declared_income_annual"] / 4 + 1e-6),
     )
 
-    # Ratio: 90d deposits vs quarter of declared income (high => income mismatch)
-    df["deposits_vs_income_ratio"] = df["total_deposits_90d"] / (
-        df["declared_income_annual"] / 4 + 1e-6
-    )
+
+def load_and_prepare(data_path: Path) -> tuple[pd.DataFrame, pd.DataFrame, np.ndarray, list[str]]:
+    """Load CSV, derive features, return df_full (keeps account_id), X, y, feature_names."""
+    df = pd.read_csv(data_path, engine="pyarrow")
+
+    # Target (pyarrow parses is_fraud as bool)
+    y = df["is_fraud"].to_numpy(dtype=np.int8)  # 1 = fraud, 0 = legit
+
+    df = derive_features(df)
 
     feature_cols = [
         "declared_income_annual",
@@ -66,14 +89,14 @@ def load_and_prepare(data_path: Path) -> tuple[pd.DataFrame, pd.Series, list[str
         "kyc_face_match_score",
         "deposits_vs_income_ratio",
     ]
-    X = df[feature_cols].copy()
-    X.columns = [c for c in feature_cols]
-    return X, y, list(X.columns)
+    # float32 halves memory traffic for Dataset construction and predict (LightGBM bins to float32 anyway)
+    X = df[feature_cols].astype(np.float32)
+    return df, X, y, list(X.columns)
 
 
 def train(
     X: pd.DataFrame,
-    y: pd.Series,
+    y: np.ndarray,
     feature_names: list[str],
 ) -> lgb.Booster:
     """Train LightGBM with class imbalance handling; return booster."""
@@ -95,8 +118,11 @@ def train(
         "num_leaves": 31,
         "learning_rate": 0.05,
         "feature_fraction": 0.8,
-        "bagging_fraction": 0.8,
+        # Balanced bagging: every bag keeps all fraud rows and half the legit rows
+        "pos_bagging_fraction": 1.0,
+        "neg_bagging_fraction": 0.5,
         "bagging_freq": 5,
+        "is_unbalance": False,  # imbalance handled by scale_pos_weight
         "verbose": -1,
         "seed": RANDOM_SEED,
         "scale_pos_weight": scale_pos_weight,  # handle ~5% fraud
@@ -113,12 +139,72 @@ def train(
     return model
 
 
-def explain_with_shap(model: lgb.Booster, X: pd.DataFrame, feature_names: list[str], n_sample: int = 500):
-    """SHAP TreeExplainer; return explainer and values on a sample (for speed)."""
-    X_sample = X.sample(n=min(n_sample, len(X)), random_state=RANDOM_SEED)
-    explainer = shap.TreeExplainer(model, data=X_sample, feature_perturbation="interventional")
-    shap_values = explainer.shap_values(X_sample)
-    return explainer, shap_values, X_sample
+def explain_with_shap(
+    model: lgb.Booster,
+    X: pd.DataFrame,
+    feature_names: list[str],
+    n_sample: int = 500,
+    extra_rows: pd.DataFrame | None = None,
+):
+    """
+    SHAP TreeExplainer; return explainer, values on a sample (for speed), the sample, and
+    values for extra_rows. extra_rows are explained in the same shap_values call as the sample.
+    Uses tree_path_dependent perturbation: expectations come from the cover counts stored in the
+    trees, so no background dataset is needed (cost no longer scales with the background size).
+    """
+    rng = np.random.default_rng(RANDOM_SEED)
+    X_sample = X.iloc[rng.choice(len(X), size=min(n_sample, len(X)), replace=False)]
+    if HAS_FASTTREESHAP:
+        explainer = fasttreeshap.TreeExplainer(
+            model, feature_perturbation="tree_path_dependent", algorithm="v2", n_jobs=-1
+        )
+    else:
+        explainer = shap.TreeExplainer(model, feature_perturbation="tree_path_dependent")
+    n_extra = 0 if extra_rows is None else len(extra_rows)
+    rows = X_sample if not n_extra else pd.concat([X_sample, extra_rows])
+    shap_values = explainer.shap_values(rows)
+    # shap_values for binary is the positive class (fraud)
+    if isinstance(shap_values, list):
+        shap_values = shap_values[1]
+    if not n_extra:
+        return explainer, shap_values, X_sample, None
+    return explainer, shap_values[:-n_extra], X_sample, shap_values[-n_extra:]
+
+
+def compile_predictor(model: lgb.Booster, lib_path: Path):
+    """
+    Compile model to a shared library at lib_path and return a predict(X) -> proba callable,
+    or None when treelite is unavailable or compilation fails (caller uses model.predict).
+    Input is passed as float32: the compiled thresholds are float32, and float64 rows sitting exactly on
+    a split value can land on the other side of it than in LightGBM.
+    """
+    if not HAS_TREELITE:
+        return None
+    try:
+        tl_model = treelite.frontend.from_lightgbm(model)
+        tl2cgen.export_lib(tl_model, toolchain="gcc", libpath=str(lib_path), params={"parallel_comp": 8})
+        predictor = tl2cgen.Predictor(str(lib_path))
+    except Exception as e:
+        print(f"Treelite compile skipped ({e}); using LightGBM predict.")
+        return None
+    return lambda X: predictor.predict(tl2cgen.DMatrix(np.asarray(X, dtype=np.float32))).reshape(-1)
+
+
+def best_f1_threshold(y: np.ndarray, proba: np.ndarray, thresholds: np.ndarray) -> tuple[float, float]:
+    """
+    Return (threshold, f1) maximising F1 over thresholds (first wins on ties; 0.5 if all F1 are 0).
+    One sort + cumulative TP counts instead of a full f1_score pass per threshold.
+    """
+    order = np.argsort(-proba, kind="stable")
+    tp = np.concatenate([[0], np.cumsum(y[order])])
+    # n_pred[i] = number of rows with proba >= thresholds[i]
+    n_pred = np.searchsorted(-proba[order], -thresholds, side="right")
+    denom = n_pred + y.sum()  # 2TP + FP + FN = predicted positives + actual positives
+    f1 = np.divide(2.0 * tp[n_pred], denom, out=np.zeros(len(thresholds)), where=denom > 0)
+    i = int(np.argmax(f1))
+    if f1[i] <= 0:
+        return 0.5, 0.0
+    return float(thresholds[i]), float(f1[i])
 
 
 def feature_importance_explanation(importance: dict) -> str:
@@ -173,26 +259,22 @@ def example_account_output(
 
 def main():
     print("Loading data...")
-    X, y, feature_names = load_and_prepare(DATA_PATH)
+    df_full, X, y, feature_names = load_and_prepare(DATA_PATH)
     print(f"Features: {feature_names}")
     print(f"Class balance: fraud={y.sum()}, legit={len(y) - y.sum()}")
 
     print("\nTraining LightGBM (class imbalance via scale_pos_weight)...")
     model = train(X, y, feature_names)
 
+    MODEL_DIR.mkdir(parents=True, exist_ok=True)
+    model.save_model(str(MODEL_PATH))
+    predict = compile_predictor(model, LIB_PATH) or model.predict
+
     # Threshold that maximizes F1 (compute before saving config)
-    proba = model.predict(X)
-    thresholds = np.linspace(0.05, 0.95, 19)
-    best_t = 0.5
-    best_f1 = 0.0
-    for t in thresholds:
-        f1 = f1_score(y, (proba >= t).astype(int), zero_division=0)
-        if f1 > best_f1:
-            best_f1, best_t = f1, t
+    proba = predict(X)
+    best_t, best_f1 = best_f1_threshold(y, proba, np.linspace(0.05, 0.95, 19))
     pred = (proba >= best_t).astype(int)
 
-    MODEL_DIR.mkdir(parents=True, exist_ok=True)
-    model.save_model(str(MODEL_PATH))
     config = json.loads(CONFIG_PATH.read_text()) if CONFIG_PATH.exists() else {}
     config["feature_names"] = feature_names
     config["decision_threshold"] = {"threshold": float(best_t)}
@@ -212,51 +294,35 @@ def main():
     print("\n--- Feature importance explanation ---")
     print(feature_importance_explanation(importance))
 
-    # SHAP (on sample for speed)
-    print("\nComputing SHAP (sample)...")
-    explainer, shap_values, X_sample = explain_with_shap(model, X, feature_names)
-    # shap_values for binary is the positive class (fraud)
-    if isinstance(shap_values, list):
-        shap_values = shap_values[1]
-
     # Example: one account predicted as fraud (high proba) and one as legit (low proba)
-    df_full = pd.read_csv(DATA_PATH)
-    df_full = df_full.assign(
-        device_shared_count=df_full["device_id"].map(df_full["device_id"].value_counts()).values,
-        ip_shared_count=df_full["ip_hash"].map(df_full["ip_hash"].value_counts()).values,
-        deposits_vs_income_ratio=(
-            df_full["total_deposits_90d"] / (df_full["declared_income_annual"] / 4 + 1e-6)
-        ),
-    )
-    X_full = df_full[feature_names]
-    proba_full = model.predict(X_full)
     # Pick example fraud: highest fraud probability among any account
-    idx_fraud = np.argmax(proba_full)
+    idx_fraud = np.argmax(proba)
     # Pick example legit: lowest fraud probability among legit-only
     legit_mask = y == 0
-    idx_legit = np.where(legit_mask)[0][np.argmin(proba_full[legit_mask])]
+    idx_legit = np.where(legit_mask)[0][np.argmin(proba[legit_mask])]
 
-    # SHAP for those two rows (use explainer on full X for those positions)
-    shap_two = explainer.shap_values(X_full.iloc[[idx_fraud, idx_legit]])
-    if isinstance(shap_two, list):
-        shap_two = shap_two[1]
+    # SHAP (on sample for speed); the two example rows ride along in the same call
+    print("\nComputing SHAP (sample)...")
+    explainer, shap_values, X_sample, shap_two = explain_with_shap(
+        model, X, feature_names, extra_rows=X.iloc[[idx_fraud, idx_legit]]
+    )
 
     ex_fraud = example_account_output(
         account_id=df_full.iloc[idx_fraud]["account_id"],
-        fraud_prob=float(proba_full[idx_fraud]),
-        is_fraud_actual=bool(y.iloc[idx_fraud]),
+        fraud_prob=float(proba[idx_fraud]),
+        is_fraud_actual=bool(y[idx_fraud]),
         shap_values_one=shap_two[0],
         feature_names=feature_names,
-        feature_values_one=X_full.iloc[idx_fraud].values,
+        feature_values_one=X.iloc[idx_fraud].values,
         decision_threshold=best_t,
     )
     ex_legit = example_account_output(
         account_id=df_full.iloc[idx_legit]["account_id"],
-        fraud_prob=float(proba_full[idx_legit]),
-        is_fraud_actual=bool(y.iloc[idx_legit]),
+        fraud_prob=float(proba[idx_legit]),
+        is_fraud_actual=bool(y[idx_legit]),
         shap_values_one=shap_two[1],
         feature_names=feature_names,
-        feature_values_one=X_full.iloc[idx_legit].values,
+        feature_values_one=X.iloc[idx_legit].values,
         decision_threshold=best_t,
     )
 
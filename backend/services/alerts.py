@@ -6,8 +6,12 @@ Returns alerts sorted by risk descending. Each alert has:
 Uses backend/data/anomaly_scores.csv when present; otherwise mock data.
 Each alert includes outcome_adjusted_priority and outcome_priority_explanation for outcome-informed sort.
 """
+from itertools import compress
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
 from backend.services.priority import compute_outcome_adjusted_priority
 
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
@@ -20,50 +24,117 @@ FEATURE_COLS = [
     "vpn_usage_pct", "countries_accessed_count", "device_shared_count", "ip_shared_count",
     "account_age_days", "kyc_face_match_score", "deposits_vs_income_ratio",
 ]
+_FCOLS = frozenset(FEATURE_COLS)
+_ALERT_COLS = frozenset(["account_id", "fraud_probability", "anomaly_score", *FEATURE_COLS])
+
+
+# Risk signals as (column, default when absent, test, one-line phrase or None, plain-language bullet).
+# A zero value never fires a signal (matches the old per-row truthiness check).
+_SIGNALS = (
+    ("vpn_usage_pct", 0, lambda v: v > 50, "elevated VPN use",
+     "Most logins came from a hidden or private network (VPN), which can be used to hide location."),
+    ("deposits_vs_income_ratio", 0, lambda v: v > 1.5, "deposits vs income mismatch",
+     "Money going in is much higher than the stated income, which is unusual."),
+    ("device_shared_count", 0, lambda v: v >= 2, "shared device",
+     "This account shares a device with several other accounts, which is common in organised abuse."),
+    ("deposit_withdraw_cycle_days_avg", 100, lambda v: v < 10, "rapid deposit-withdrawal cycle",
+     "Money is being moved in and out very quickly instead of being held, which can indicate layering."),
+    ("kyc_face_match_score", 1, lambda v: v < 0.85, None,
+     "Identity check (photo match) was weaker than usual."),
+)
+_ONE_LINE_FALLBACK = "anomaly vs normal behavior"
+_RISK_FACTORS_FALLBACK = "Activity pattern differs from what we usually see for similar accounts."
+
+
+def _risk_levels(prob: np.ndarray, anomaly: np.ndarray) -> np.ndarray:
+    """Use combined score so anomaly_score can lift risk when fraud_prob is conservative."""
+    composite = 0.5 * prob + 0.5 * anomaly
+    return np.where(composite >= 0.5, "High", np.where(composite >= 0.3, "Medium", "Low"))
 
 
-def _risk_level(prob: float, anomaly: float = 0) -> str:
-    """Use combined score so anomaly_score can lift risk when fraud_prob is conservative."""
-    composite = 0.5 * prob + 0.5 * (anomaly if anomaly is not None else 0)
-    if composite >= 0.5:
-        return "High"
-    if composite >= 0.3:
-        return "Medium"
-    return "Low"
-
-
-def _one_line_from_row(row) -> str:
-    """Build a short AI-style explanation from a data row."""
-    parts = []
-    if row.get("vpn_usage_pct", 0) and float(row.get("vpn_usage_pct", 0)) > 50:
-        parts.append("elevated VPN use")
-    if row.get("deposits_vs_income_ratio", 0) and float(row.get("deposits_vs_income_ratio", 0)) > 1.5:
-        parts.append("deposits vs income mismatch")
-    if row.get("device_shared_count", 0) and int(row.get("device_shared_count", 0)) > 1:
-        parts.append("shared device")
-    if row.get("deposit_withdraw_cycle_days_avg", 100) and float(row.get("deposit_withdraw_cycle_days_avg", 100)) < 10:
-        parts.append("rapid deposit-withdrawal cycle")
-    if not parts:
-        parts.append("anomaly vs normal behavior")
-    return " ".join(parts[:3]).capitalize() + "."
-
-
-def _risk_factors_from_row(row) -> list[str]:
-    """Plain-language bullet list for the AI Explanation panel (no jargon)."""
-    bullets = []
-    if row.get("vpn_usage_pct", 0) and float(row.get("vpn_usage_pct", 0)) > 50:
-        bullets.append("Most logins came from a hidden or private network (VPN), which can be used to hide location.")
-    if row.get("deposits_vs_income_ratio", 0) and float(row.get("deposits_vs_income_ratio", 0)) > 1.5:
-        bullets.append("Money going in is much higher than the stated income, which is unusual.")
-    if row.get("device_shared_count", 0) and int(row.get("device_shared_count", 0)) > 1:
-        bullets.append("This account shares a device with several other accounts, which is common in organised abuse.")
-    if row.get("deposit_withdraw_cycle_days_avg", 100) and float(row.get("deposit_withdraw_cycle_days_avg", 100)) < 10:
-        bullets.append("Money is being moved in and out very quickly instead of being held, which can indicate layering.")
-    if row.get("kyc_face_match_score", 1) and float(row.get("kyc_face_match_score", 1)) < 0.85:
-        bullets.append("Identity check (photo match) was weaker than usual.")
-    if not bullets:
-        bullets.append("Activity pattern differs from what we usually see for similar accounts.")
-    return bullets[:6]
+def _signal_masks(df) -> np.ndarray:
+    """(N, len(_SIGNALS)) bool matrix: which risk signals fire for each row."""
+    masks = np.empty((len(df), len(_SIGNALS)), dtype=bool)
+    for j, (col, default, test, _, _) in enumerate(_SIGNALS):
+        v = df[col].to_numpy(dtype=float) if col in df.columns else np.full(len(df), float(default))
+        with np.errstate(invalid="ignore"):
+            masks[:, j] = (v != 0) & test(v)
+    return masks
+
+
+_PHRASES = tuple(p for _, _, _, p, _ in _SIGNALS if p is not None)
+_BULLETS = tuple(b for _, _, _, _, b in _SIGNALS)
+
+
+def _explanations(masks: np.ndarray) -> tuple[list[str], list[list[str]]]:
+    """
+    One pass over the mask rows: short AI-style explanation (up to three phrases) and the
+    plain-language bullet list for the AI Explanation panel (no jargon).
+    """
+    n_phrases = len(_PHRASES)
+    one_lines, factors = [], []
+    for row in masks.tolist():
+        parts = list(compress(_PHRASES, row[:n_phrases]))[:3] or [_ONE_LINE_FALLBACK]
+        one_lines.append(" ".join(parts).capitalize() + ".")
+        factors.append(list(compress(_BULLETS, row)) or [_RISK_FACTORS_FALLBACK])
+    return one_lines, factors
+
+
+# Default chronological events for timeline (used when no account-specific timeline).
+# One shared module-level tuple referenced by every alert; consumers only read it. Plain dicts (not
+# MappingProxyType) so alerts stay JSON-serialisable for the Visualization agent and picklable for caches.
+_TIMELINE: tuple[dict, ...] = (
+    {"timestamp": "2025-01-15 14:22", "event_type": "Login", "details": "IP 192.168.1.1", "suspicious": True},
+    {"timestamp": "2025-01-15 14:23", "event_type": "Deposit", "details": "5,000", "suspicious": True},
+    {"timestamp": "2025-01-15 14:45", "event_type": "Withdrawal", "details": "4,800", "suspicious": False},
+    {"timestamp": "2025-01-16 09:00", "event_type": "Login", "details": "", "suspicious": False},
+    {"timestamp": "2025-01-16 09:15", "event_type": "Deposit", "details": "15,000", "suspicious": True},
+    {"timestamp": "2025-01-16 10:00", "event_type": "KYC attempt", "details": "document upload", "suspicious": True},
+)
+
+
+# Parsed anomaly_scores.csv, keyed by (mtime_ns, size, nrows); one entry, replaced when the file changes
+_CACHE: dict[tuple[int, int, int], pd.DataFrame] = {}
+
+
+def _read_scores(nrows: int) -> pd.DataFrame:
+    """Parse the first nrows of anomaly_scores.csv, reusing the last parse while the file is unchanged."""
+    st = ANOMALY_CSV.stat()
+    key = (st.st_mtime_ns, st.st_size, nrows)
+    df = _CACHE.get(key)
+    if df is None:
+        # Only the first limit*4 rows are ranked; skip parsing the rest and any extra columns.
+        # (nrows is not supported by the pyarrow engine, so this stays on the C parser.)
+        df = pd.read_csv(ANOMALY_CSV, nrows=nrows, usecols=lambda c: c in _ALERT_COLS)
+        _CACHE.clear()
+        _CACHE[key] = df
+    return df
+
+
+def _top_k(risk_level: np.ndarray, prob: np.ndarray, k: int) -> np.ndarray:
+    """
+    Positions of the k highest-risk rows (High first, then fraud_probability desc), ties in row order.
+    argpartition on a composite key picks the candidates in O(N); only those are sorted.
+    """
+    risk_ord = np.select([risk_level == "High", risk_level == "Medium"], [0, 1], 2)
+    key = risk_ord * 2.0 - prob
+    cand = np.arange(len(key))
+    if k < len(key):
+        kth = np.partition(key, k - 1)[k - 1] if k > 0 else -np.inf
+        if not np.isnan(kth):
+            # <= keeps every row tied with the k-th so the stable sort below picks the same rows as a full sort
+            cand = np.flatnonzero(key <= kth)
+    order = np.lexsort((-prob[cand], risk_ord[cand]))
+    return cand[order[:k]]
+
+
+def _with_priority(alerts: list[dict]) -> list[dict]:
+    """Attach outcome_adjusted_priority and outcome_priority_explanation to each alert (in place)."""
+    for a in alerts:
+        pri = compute_outcome_adjusted_priority(a)
+        a["outcome_adjusted_priority"] = pri["outcome_adjusted_priority"]
+        a["outcome_priority_explanation"] = pri["outcome_priority_explanation"]
+    return alerts
 
 
 def get_alerts(limit: int = 50) -> list[dict]:
@@ -73,69 +144,53 @@ def get_alerts(limit: int = 50) -> list[dict]:
     """
     if ANOMALY_CSV.exists():
         try:
-            import pandas as pd
-            df = pd.read_csv(ANOMALY_CSV)
+            df = _read_scores(limit * 4).copy(deep=False)
             if "account_id" not in df.columns or "fraud_probability" not in df.columns:
                 return _mock_alerts()
-            default_timeline = _default_timeline_events()
-            df = df.head(limit * 4)
-            df["risk_level"] = df.apply(
-                lambda r: _risk_level(float(r["fraud_probability"]), float(r.get("anomaly_score", 0))),
-                axis=1,
-            )
-            df["one_line_explanation"] = df.apply(_one_line_from_row, axis=1)
-            df["risk_factors"] = df.apply(_risk_factors_from_row, axis=1)
+            prob = df["fraud_probability"].to_numpy(dtype=float)
+            anomaly = df["anomaly_score"].to_numpy(dtype=float) if "anomaly_score" in df.columns else np.zeros(len(df))
+            masks = _signal_masks(df)
+            df["risk_level"] = _risk_levels(prob, anomaly)
+            df["one_line_explanation"], df["risk_factors"] = _explanations(masks)
             # Sort by risk descending: High first, then by fraud_probability desc
-            risk_order = {"High": 0, "Medium": 1, "Low": 2}
-            df["_risk_ord"] = df["risk_level"].map(risk_order)
-            df = df.sort_values(by=["_risk_ord", "fraud_probability"], ascending=[True, False]).drop(columns=["_risk_ord"])
-            rows = df.head(limit).to_dict("records")
-            def _vec(r):
+            top = df.iloc[_top_k(df["risk_level"].to_numpy(), prob, limit)]
+            # Plain column lists for the selected rows: index by position instead of per-row dict lookups
+            col = {c: top[c].tolist() for c in top.columns}
+            n = len(top)
+            missing = [None] * n
+            anomaly_col = col.get("anomaly_score", [0] * n)
+            feat_cols = [col.get(c, missing) for c in FEATURE_COLS]
+            # One contiguous float matrix for the similarity vectors (None when a feature column is absent)
+            feat_matrix = None
+            if _FCOLS.issubset(top.columns):
                 try:
-                    return [float(r.get(c, 0)) for c in FEATURE_COLS if c in r]
+                    feat_matrix = top[FEATURE_COLS].to_numpy(dtype=np.float64)
                 except (TypeError, ValueError):
-                    return None
+                    pass
             out = [
                 {
-                    "account_id": r["account_id"],
-                    "fraud_probability": float(r["fraud_probability"]),
-                    "anomaly_score": float(r.get("anomaly_score", 0)),
-                    "risk_level": r["risk_level"],
-                    "one_line_explanation": r["one_line_explanation"],
-                    "risk_factors": r["risk_factors"],
-                    "timeline_events": default_timeline,
-                    "feature_vector": _vec(r) if all(c in r for c in FEATURE_COLS) else None,
-                    **{c: r.get(c) for c in FEATURE_COLS},
+                    "account_id": col["account_id"][i],
+                    "fraud_probability": float(col["fraud_probability"][i]),
+                    "anomaly_score": float(anomaly_col[i]),
+                    "risk_level": col["risk_level"][i],
+                    "one_line_explanation": col["one_line_explanation"][i],
+                    "risk_factors": col["risk_factors"][i],
+                    "timeline_events": _TIMELINE,
+                    "feature_vector": feat_matrix[i].tolist() if feat_matrix is not None else None,
+                    **{c: f[i] for c, f in zip(FEATURE_COLS, feat_cols)},
                 }
-                for r in rows
+                for i in range(n)
             ]
-            for a in out:
-                pri = compute_outcome_adjusted_priority(a)
-                a["outcome_adjusted_priority"] = pri["outcome_adjusted_priority"]
-                a["outcome_priority_explanation"] = pri["outcome_priority_explanation"]
-            return out
+            return _with_priority(out)
         except Exception:
             pass
     return _mock_alerts()
 
 
-def _default_timeline_events() -> list[dict]:
-    """Default chronological events for timeline (used when no account-specific timeline)."""
-    return [
-        {"timestamp": "2025-01-15 14:22", "event_type": "Login", "details": "IP 192.168.1.1", "suspicious": True},
-        {"timestamp": "2025-01-15 14:23", "event_type": "Deposit", "details": "5,000", "suspicious": True},
-        {"timestamp": "2025-01-15 14:45", "event_type": "Withdrawal", "details": "4,800", "suspicious": False},
-        {"timestamp": "2025-01-16 09:00", "event_type": "Login", "details": "", "suspicious": False},
-        {"timestamp": "2025-01-16 09:15", "event_type": "Deposit", "details": "15,000", "suspicious": True},
-        {"timestamp": "2025-01-16 10:00", "event_type": "KYC attempt", "details": "document upload", "suspicious": True},
-    ]
-
-
 def _mock_alerts() -> list[dict]:
-    timeline = _default_timeline_events()
     # Mock alerts: no feature_vector (similarity falls back to risk_level); raw features absent/None for agents
     def _m(account_id, prob, anom, level, expl, factors):
-        base = {"account_id": account_id, "fraud_probability": prob, "anomaly_score": anom, "risk_level": level, "one_line_explanation": expl, "risk_factors": factors, "timeline_events": timeline, "feature_vector": None}
+        base = {"account_id": account_id, "fraud_probability": prob, "anomaly_score": anom, "risk_level": level, "one_line_explanation": expl, "risk_factors": factors, "timeline_events": _TIMELINE, "feature_vector": None}
         for c in FEATURE_COLS:
             base[c] = None
         return base
@@ -147,8 +202,4 @@ def _mock_alerts() -> list[dict]:
         _m("ACC-L-02336", 0.22, 0.44, "Low", "Slightly elevated anomaly score; within range.", ["Some small differences from typical behavior; may be normal variation."]),
         _m("ACC-L-02403", 0.12, 0.18, "Low", "Low risk; routine review.", ["Routine check; no strong risk factors identified."]),
     ]
-    for a in out:
-        pri = compute_outcome_adjusted_priority(a)
-        a["outcome_adjusted_priority"] = pri["outcome_adjusted_priority"]
-        a["outcome_priority_explanation"] = pri["outcome_priority_explanation"]
-    return out
+    return _with_priority(out)
@@ -19,89 +19,106 @@ HIGH_RISK_VPN_PCT = 50
 HIGH_RISK_COUNTRIES = 5
 
 
+# anomaly_scores.csv indexed by account_id, plus its ids as a frozenset for fast misses;
+# reloaded when the file's (mtime_ns, size) changes. "scanned" is the file key a chunked scan last ran for
+_ALERT_CACHE: dict = {"key": None, "df": None, "ids": frozenset(), "scanned": None}
+
+# Above this size the first cold lookup streams the CSV in chunks instead of loading it whole;
+# later lookups build and use the index
+_CHUNKED_READ_BYTES = 100 * 1024 * 1024
+_CHUNK_ROWS = 100_000
+
+
+def _scores_by_account() -> pd.DataFrame | None:
+    """anomaly_scores.csv indexed by account_id (first row wins on duplicates), or None without account_id."""
+    st = ANOMALY_CSV.stat()
+    key = (st.st_mtime_ns, st.st_size)
+    if _ALERT_CACHE["key"] != key:
+        df = pd.read_csv(ANOMALY_CSV)
+        if "account_id" in df.columns:
+            df = df.drop_duplicates("account_id").set_index("account_id", drop=False)
+            ids = frozenset(df.index)
+        else:
+            df = None
+            ids = frozenset()
+        _ALERT_CACHE.update(key=key, df=df, ids=ids)
+    return _ALERT_CACHE["df"]
+
+
 def _get_alert_row(account_id: str, alert: dict | None) -> dict | None:
     """
-    Return the alert row for account_id: from optional alert dict, or by reading
-    anomaly_scores.csv. Returns None if not found or CSV missing.
+    Return the alert row for account_id: from optional alert dict, or by lookup in the
+    cached anomaly_scores.csv. Returns None if not found or CSV missing.
     """
     if alert is not None and alert.get("account_id") == account_id:
         return alert
     if not ANOMALY_CSV.exists():
         return None
     try:
-        df = pd.read_csv(ANOMALY_CSV)
-        if "account_id" not in df.columns:
-            return None
-        rows = df[df["account_id"] == account_id]
-        if rows.empty:
+        st = ANOMALY_CSV.stat()
+        key = (st.st_mtime_ns, st.st_size)
+        if _ALERT_CACHE["key"] != key and st.st_size > _CHUNKED_READ_BYTES and _ALERT_CACHE["scanned"] != key:
+            # First lookup on a large, unindexed file: answer from a streaming scan, index on the next one
+            _ALERT_CACHE["scanned"] = key
+            return _scan_for_row(account_id)
+        df = _scores_by_account()
+        if df is None or account_id not in _ALERT_CACHE["ids"]:
             return None
-        return rows.iloc[0].to_dict()
+        return df.loc[account_id].to_dict()
     except Exception:
         return None
 
 
+def _scan_for_row(account_id: str) -> dict | None:
+    """First anomaly_scores.csv row for account_id, reading chunk by chunk and stopping at the hit."""
+    with pd.read_csv(ANOMALY_CSV, chunksize=_CHUNK_ROWS) as reader:
+        for chunk in reader:
+            hit = chunk[chunk["account_id"] == account_id]
+            if not hit.empty:
+                return hit.iloc[0].to_dict()
+    return None
+
+
 def _no_data_df() -> pd.DataFrame:
     """Single-row DataFrame for missing data."""
     return pd.DataFrame([{"message": "No data available"}])
 
 
-def get_transactions(account_id: str, alert: dict | None = None) -> pd.DataFrame:
-    """
-    Transaction summary for the account (90d). Dataset has 90d counts only; we do not invent 30d.
-    Columns: deposit_count_90d, withdrawal_count_90d, deposits_vs_income_ratio,
-    avg_deposit_amount, deposit_withdraw_cycle_days_avg.
-    """
-    row = _get_alert_row(account_id, alert)
-    if row is None:
-        return _no_data_df()
+def _transactions_from_row(row: dict) -> dict:
     num_dep = int(row.get("num_deposits_90d") or 0)
     num_wd = int(row.get("num_withdrawals_90d") or 0)
     total_dep = float(row.get("total_deposits_90d") or 0)
     ratio = row.get("deposits_vs_income_ratio")
     cycle = row.get("deposit_withdraw_cycle_days_avg")
     avg_dep = total_dep / max(1, num_dep) if num_dep else 0.0
-    return pd.DataFrame([{
+    return {
         "deposit_count_90d": num_dep,
         "withdrawal_count_90d": num_wd,
         "deposits_vs_income_ratio": float(ratio) if ratio is not None else None,
         "avg_deposit_amount": round(avg_dep, 2),
         "deposit_withdraw_cycle_days_avg": round(float(cycle), 2) if cycle is not None else None,
-    }])
+    }
 
 
-def get_geo_activity(account_id: str, alert: dict | None = None) -> pd.DataFrame:
-    """
-    Geo/VPN activity. high_risk_country_flag derived from vpn_usage_pct > 50 or
-    countries_accessed_count > 5 (explainable rule).
-    """
-    row = _get_alert_row(account_id, alert)
-    if row is None:
-        return _no_data_df()
+def _geo_from_row(row: dict) -> dict:
     countries = int(row.get("countries_accessed_count") or 0)
     vpn_pct = float(row.get("vpn_usage_pct") or 0)
     high_risk = (vpn_pct > HIGH_RISK_VPN_PCT) or (countries > HIGH_RISK_COUNTRIES)
-    return pd.DataFrame([{
+    return {
         "countries_accessed_count": countries,
         "vpn_usage_pct": round(vpn_pct, 1),
         "high_risk_country_flag": high_risk,
-    }])
+    }
 
 
-def get_identity_signals(account_id: str, alert: dict | None = None) -> pd.DataFrame:
-    """
-    Identity signals. document_verified = kyc_face_match_score >= 0.85.
-    identity_risk_level: <0.7 High, 0.7–0.85 Medium, >=0.85 Low.
-    """
-    row = _get_alert_row(account_id, alert)
-    if row is None:
-        return _no_data_df()
+def _identity_from_row(row: dict) -> dict:
     kyc = row.get("kyc_face_match_score")
     if kyc is None:
-        return pd.DataFrame([{
+        return {
             "kyc_face_match_score": None,
             "document_verified": False,
             "identity_risk_level": "Unknown",
-        }])
+        }
     kyc_f = float(kyc)
     doc_verified = kyc_f >= DOCUMENT_VERIFIED_KYC_THRESHOLD
     if kyc_f < IDENTITY_RISK_HIGH:
@@ -110,21 +127,83 @@ def get_identity_signals(account_id: str, alert: dict | None = None) -> pd.DataF
         risk_level = "Medium"
     else:
         risk_level = "Low"
-    return pd.DataFrame([{
+    return {
         "kyc_face_match_score": round(kyc_f, 2),
         "document_verified": doc_verified,
         "identity_risk_level": risk_level,
-    }])
+    }
 
 
-def get_network_signals(account_id: str, alert: dict | None = None) -> pd.DataFrame:
-    """Device and IP sharing counts (table, not graph)."""
+def _network_from_row(row: dict) -> dict:
+    return {
+        "device_shared_count": int(row.get("device_shared_count") or 0),
+        "ip_shared_count": int(row.get("ip_shared_count") or 0),
+    }
+
+
+_EVIDENCE_BUILDERS = {
+    "transactions": _transactions_from_row,
+    "geo": _geo_from_row,
+    "identity": _identity_from_row,
+    "network": _network_from_row,
+}
+
+
+def get_evidence(account_id: str, alert: dict | None = None) -> dict[str, dict] | None:
+    """
+    All four evidence sections as plain dicts ({"transactions", "geo", "identity", "network"}) from a
+    single row lookup, or None if the account is not found. The get_* functions below wrap one
+    section each in a one-row DataFrame for table rendering.
+    """
+    row = _get_alert_row(account_id, alert)
+    if row is None:
+        return None
+    return {name: build(row) for name, build in _EVIDENCE_BUILDERS.items()}
+
+
+def get_evidence_tables(account_id: str, alert: dict | None = None) -> dict[str, pd.DataFrame]:
+    """
+    get_evidence() as one-row DataFrames keyed by section (the no-data frame for every section when the
+    account is not found): all four Evidence tables from a single row lookup.
+    """
+    sections = get_evidence(account_id, alert)
+    if sections is None:
+        return {name: _no_data_df() for name in _EVIDENCE_BUILDERS}
+    return {name: pd.DataFrame([values]) for name, values in sections.items()}
+
+
+def _section_df(section: str, account_id: str, alert: dict | None) -> pd.DataFrame:
     row = _get_alert_row(account_id, alert)
     if row is None:
         return _no_data_df()
-    dev = int(row.get("device_shared_count") or 0)
-    ip = int(row.get("ip_shared_count") or 0)
-    return pd.DataFrame([{
-        "device_shared_count": dev,
-        "ip_shared_count": ip,
-    }])
+    return pd.DataFrame([_EVIDENCE_BUILDERS[section](row)])
+
+
+def get_transactions(account_id: str, alert: dict | None = None) -> pd.DataFrame:
+    """
+    Transaction summary for the account (90d). Dataset has 90d counts only; we do not invent 30d.
+    Columns: deposit_count_90d, withdrawal_count_90d, deposits_vs_income_ratio,
+    avg_deposit_amount, deposit_withdraw_cycle_days_avg.
+    """
+    return _section_df("transactions", account_id, alert)
+
+
+def get_geo_activity(account_id: str, alert: dict | None = None) -> pd.DataFrame:
+    """
+    Geo/VPN activity. high_risk_country_flag derived from vpn_usage_pct > 50 or
+    countries_accessed_count > 5 (explainable rule).
+    """
+    return _section_df("geo", account_id, alert)
+
+
+def get_identity_signals(account_id: str, alert: dict | None = None) -> pd.DataFrame:
+    """
+    Identity signals. document_verified = kyc_face_match_score >= 0.85.
+    identity_risk_level: <0.7 High, 0.7–0.85 Medium, >=0.85 Low.
+    """
+    return _section_df("identity", account_id, alert)
+
+
+def get_network_signals(account_id: str, alert: dict | None = None) -> pd.DataFrame:
+    """Device and IP sharing counts (table, not graph)."""
+    return _section_df("network", account_id, alert)
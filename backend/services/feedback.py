@@ -2,47 +2,258 @@
 Investigator feedback store: decisions (Confirm Fraud, Mark Legit, Dismiss as false positive)
 with reason and timestamp for audit trail and continuous learning.
 
-Stored in backend/data/investigator_feedback.json.
-Supports similarity-based "matches N confirmed cases" via stored feature vectors.
+Stored in backend/data/investigator_feedback.jsonl (one JSON record per line; decisions are appended).
+A legacy investigator_feedback.json array is read until the first write migrates it.
+Supports similarity-based "matches N confirmed cases" via stored feature vectors, which are
+appended as raw float64 to investigator_feature_vectors.f64 and referenced from their record by
+vector_offset / vector_len (older records may still carry an inline feature_vector list).
 """
 from __future__ import annotations
 
+import io
 import json
 import os
+import threading
 from datetime import datetime, timezone
 from pathlib import Path
 
+import numpy as np
+
+# Optional: orjson is several times faster than json for both dumps and loads (bytes in/out).
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Optional: numba JIT-compiles the similarity count kernel; without it the BLAS matrix-vector path is used
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        return lambda f: f
+
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
-FEEDBACK_FILE = DATA_DIR / "investigator_feedback.json"
+FEEDBACK_FILE = DATA_DIR / "investigator_feedback.jsonl"
+_LEGACY_FEEDBACK_FILE = DATA_DIR / "investigator_feedback.json"
+VECTORS_FILE = DATA_DIR / "investigator_feature_vectors.f64"
+_VECTOR_DTYPE = np.dtype("<f8")
+# Serializes appends so two writers never compute the same offset for VECTORS_FILE
+_VECTORS_LOCK = threading.Lock()
 MODEL_VERSION = os.environ.get("FRAUD_MODEL_VERSION", "v0.3")
 
 
+# Parsed records keyed on (path, mtime_ns, size) of the file they came from; cleared on every write.
+# "vectors" holds per-decision similarity matrices derived from those records (see _stored_vectors).
+_CACHE: dict = {"key": None, "records": None, "vectors": {}}
+
+
 def _load() -> list[dict]:
-    if not FEEDBACK_FILE.exists():
+    """All feedback records (cached until the file changes). Treat the returned list as read-only."""
+    path = FEEDBACK_FILE if FEEDBACK_FILE.exists() else _LEGACY_FEEDBACK_FILE
+    if not path.exists():
         return []
+    st = path.stat()
+    key = (path, st.st_mtime_ns, st.st_size)
+    if _CACHE["key"] == key:
+        return _CACHE["records"]
+    records = _parse_jsonl() if path == FEEDBACK_FILE else _load_legacy()
+    _CACHE.update(key=key, records=records, vectors={})
+    return records
+
+
+def _parse_jsonl() -> list[dict]:
+    records = []
     try:
-        with open(FEEDBACK_FILE) as f:
+        with open(FEEDBACK_FILE, "rb") as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        records.append(_loads(line))
+                    except ValueError:
+                        continue  # skip a torn line (e.g. interrupted append); keep the rest of the history
+    except Exception:
+        return []
+    return records
+
+
+def _load_legacy() -> list[dict]:
+    """Records from the pre-JSONL investigator_feedback.json array, if present."""
+    if not _LEGACY_FEEDBACK_FILE.exists():
+        return []
+    try:
+        with open(_LEGACY_FEEDBACK_FILE) as f:
             return json.load(f)
     except Exception:
         return []
 
 
+def _dumps(rec: dict) -> bytes:
+    """One JSONL line (compact, newline-terminated)."""
+    if HAS_ORJSON:
+        return orjson.dumps(rec, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(rec, separators=(",", ":")) + "\n").encode()
+
+
+_loads = orjson.loads if HAS_ORJSON else json.loads
+
+
 def _save(records: list[dict]) -> None:
+    """
+    Rewrite the whole file (compaction path for in-place edits). Written to a temp file through one
+    64 KiB buffer, fsynced once, then renamed over FEEDBACK_FILE so a crash never truncates the audit trail.
+    """
+    _CACHE["key"] = None
     DATA_DIR.mkdir(parents=True, exist_ok=True)
-    with open(FEEDBACK_FILE, "w") as f:
-        json.dump(records, f, indent=2)
+    tmp = FEEDBACK_FILE.with_suffix(".jsonl.tmp")
+    with open(tmp, "wb", buffering=0) as raw, io.BufferedWriter(raw, buffer_size=1 << 16) as f:
+        for r in records:
+            f.write(_dumps(r))
+        f.flush()
+        os.fsync(raw.fileno())
+    os.replace(tmp, FEEDBACK_FILE)
+
 
+def _append(rec: dict) -> None:
+    """
+    Append one record; O(1) in history size. First write migrates a legacy JSON file.
+    The handle is opened per call (not kept open) so each record is flushed before _load() next stats the file.
+    """
+    if not FEEDBACK_FILE.exists() and _LEGACY_FEEDBACK_FILE.exists():
+        _save(_load_legacy() + [rec])
+        return
+    _CACHE["key"] = None
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    with open(FEEDBACK_FILE, "ab", buffering=1 << 16) as f:
+        f.write(_dumps(rec))
 
-def _cosine_sim(a: list[float], b: list[float]) -> float:
-    """Cosine similarity in [0, 1] (assume non-negative features)."""
-    if len(a) != len(b) or len(a) == 0:
-        return 0.0
-    dot = sum(x * y for x, y in zip(a, b))
-    norm_a = sum(x * x for x in a) ** 0.5
-    norm_b = sum(x * x for x in b) ** 0.5
-    if norm_a < 1e-9 or norm_b < 1e-9:
-        return 0.0
-    return max(0.0, min(1.0, dot / (norm_a * norm_b)))
+
+def _append_vector(feature_vector: list[float]) -> tuple[int, int]:
+    """Append one vector to VECTORS_FILE; returns its (offset, length) in float64 elements."""
+    arr = np.asarray(feature_vector, dtype=_VECTOR_DTYPE)
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    with _VECTORS_LOCK, open(VECTORS_FILE, "ab") as f:
+        end = f.seek(0, os.SEEK_END)
+        pad = -end % _VECTOR_DTYPE.itemsize  # realign after a torn write
+        if pad:
+            f.write(b"\0" * pad)
+        f.write(arr.tobytes())
+    return (end + pad) // _VECTOR_DTYPE.itemsize, len(arr)
+
+
+def _vector_store() -> np.ndarray | None:
+    """VECTORS_FILE as a read-only flat float64 memmap, or None if missing/empty."""
+    try:
+        n = VECTORS_FILE.stat().st_size // _VECTOR_DTYPE.itemsize
+    except OSError:
+        return None
+    if n == 0:
+        return None
+    return np.memmap(VECTORS_FILE, dtype=_VECTOR_DTYPE, mode="r", shape=(n,))
+
+
+def _stored_vectors(decision: str) -> tuple[np.ndarray, np.ndarray] | None:
+    """
+    Stored feature vectors of records with this decision as a float64 matrix (one row per vector,
+    all of the first stored vector's length) plus row norms. Built once per cached _load() result.
+    Vectors of any other length (or missing from VECTORS_FILE) are kept as zero rows (similarity 0, as before).
+    """
+    records = _load()
+    if not records:
+        return None
+    vectors = _CACHE["vectors"]
+    if decision not in vectors:
+        vectors[decision] = _build_vectors([r for r in records if r.get("decision") == decision])
+    return vectors[decision]
+
+
+def _build_vectors(records: list[dict]) -> tuple[np.ndarray, np.ndarray] | None:
+    rows: list = []  # per vector: an inline list, or (offset, length) into VECTORS_FILE
+    for r in records:
+        if isinstance(r.get("feature_vector"), list):
+            rows.append(r["feature_vector"])
+        elif isinstance(r.get("vector_offset"), int) and isinstance(r.get("vector_len"), int):
+            rows.append((r["vector_offset"], r["vector_len"]))
+    if not rows:
+        return None
+    first = rows[0]
+    dim = len(first) if isinstance(first, list) else first[1]
+    if not dim:
+        return None
+    M = np.zeros((len(rows), dim), dtype=np.float64)
+    ref_rows, ref_offsets = [], []
+    for k, row in enumerate(rows):
+        if isinstance(row, list):
+            if len(row) == dim:
+                M[k] = row
+        elif row[1] == dim:
+            ref_rows.append(k)
+            ref_offsets.append(row[0])
+    if ref_rows:
+        store = _vector_store()
+        if store is not None:
+            offsets = np.asarray(ref_offsets, dtype=np.int64)
+            ok = (offsets >= 0) & (offsets + dim <= len(store))
+            idx = offsets[ok, None] + np.arange(dim)
+            M[np.asarray(ref_rows)[ok]] = store[idx]  # one gather from the memmap
+    return M, np.linalg.norm(M, axis=1)
+
+
+@njit(cache=True)
+def _batched_cosine_ge(M, norms, q, qn, thr):
+    """Rows of M whose clamped cosine similarity to q is >= thr (zero-norm rows have similarity 0)."""
+    c = 0
+    for i in range(M.shape[0]):
+        denom = norms[i] * qn
+        sim = 0.0
+        if norms[i] >= 1e-9 and denom >= 1e-9:
+            s = 0.0
+            for k in range(M.shape[1]):
+                s += M[i, k] * q[k]
+            sim = min(max(s / denom, 0.0), 1.0)
+        if sim >= thr:
+            c += 1
+    return c
+
+
+def _count_similar(decision: str, q: np.ndarray, similarity_threshold: float) -> int | None:
+    """
+    Number of stored vectors for decision with cosine similarity (clamped to [0, 1]; assume
+    non-negative features) >= threshold, in one matrix-vector product (or one numba loop). None when there are no
+    stored vectors of the query's length (caller falls back to risk_level).
+    """
+    index = _stored_vectors(decision)
+    if index is None or index[0].shape[1] != len(q):
+        return None
+    M, norms = index
+    if HAS_NUMBA:
+        return int(_batched_cosine_ge(M, norms, q, float(np.linalg.norm(q)), float(similarity_threshold)))
+    denom = norms * np.linalg.norm(q)
+    ok = (norms >= 1e-9) & (denom >= 1e-9)
+    sims = np.zeros(len(M))
+    np.divide(M @ q, denom, out=sims, where=ok)
+    return int((np.clip(sims, 0.0, 1.0) >= similarity_threshold).sum())
+
+
+def _similar(decision: str, risk_levels: list, risk_level: str, q: np.ndarray | None, similarity_threshold: float) -> int:
+    """
+    Count for one decision class given the risk_level of each of its records: cosine similarity
+    when q is given and vectors are stored, else records with the same risk_level.
+    """
+    if not risk_levels:
+        return 0
+    if q is not None:
+        n = _count_similar(decision, q, similarity_threshold)
+        if n is not None:
+            return n
+    return risk_levels.count(risk_level)
+
+
+def _query(feature_vector: list[float] | None) -> np.ndarray | None:
+    return np.asarray(feature_vector, dtype=np.float64) if feature_vector else None
 
 
 def add_decision(
@@ -62,7 +273,6 @@ def add_decision(
     decision: "Confirmed Fraud" | "Marked Legit" | "False Positive"
     When decision is Confirmed Fraud, False Positive, or Marked Legit and feature_vector is provided, it is stored for similarity matching (e.g. outcome-informed priority).
     """
-    records = _load()
     inv_id = investigator_id or os.environ.get("INVESTIGATOR_ID", "demo")
     rec = {
         "account_id": account_id,
@@ -76,9 +286,8 @@ def add_decision(
         "model_version": model_version or MODEL_VERSION,
     }
     if decision in ("Confirmed Fraud", "False Positive", "Marked Legit") and feature_vector and len(feature_vector) > 0:
-        rec["feature_vector"] = feature_vector
-    records.append(rec)
-    _save(records)
+        rec["vector_offset"], rec["vector_len"] = _append_vector(feature_vector)
+    _append(rec)
 
 
 def add_knowledge_pattern(account_id: str, pattern: dict) -> None:
@@ -86,10 +295,10 @@ def add_knowledge_pattern(account_id: str, pattern: dict) -> None:
     Attach a knowledge-capture pattern to the most recent decision for this account.
     pattern should have keys such as key_signals, behavioral_pattern, final_outcome, one_sentence_description.
     """
-    records = _load()
+    records = list(_load())  # copy: _load() returns the shared cached list
     for i in range(len(records) - 1, -1, -1):
         if records[i].get("account_id") == account_id:
-            records[i]["knowledge_pattern"] = pattern
+            records[i] = {**records[i], "knowledge_pattern": pattern}
             _save(records)
             return
     # No decision found for this account; append a minimal record so pattern is not lost (edge case)
@@ -100,16 +309,15 @@ def add_knowledge_pattern(account_id: str, pattern: dict) -> None:
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "knowledge_pattern": pattern,
     }
-    records.append(rec)
-    _save(records)
+    _append(rec)
 
 
 def get_decisions(account_id: str | None = None) -> list[dict]:
     """Return all feedback records, optionally filtered by account_id."""
     records = _load()
     if account_id is not None:
-        records = [r for r in records if r.get("account_id") == account_id]
-    return records
+        return [r for r in records if r.get("account_id") == account_id]
+    return list(records)
 
 
 def get_latest_decision(account_id: str) -> dict | None:
@@ -132,17 +340,8 @@ def get_similar_confirmed_count(
     - Else: fall back to same risk_level (behavioral bucket).
     UI copy: "Behavioral pattern similar to N previously confirmed fraud cases."
     """
-    records = _load()
-    confirmed = [r for r in records if r.get("decision") == "Confirmed Fraud"]
-    if not confirmed:
-        return 0
-    # Similarity-based when we have current vector and stored vectors
-    if feature_vector and len(feature_vector) > 0:
-        stored = [r.get("feature_vector") for r in confirmed if isinstance(r.get("feature_vector"), list)]
-        if stored and len(stored[0]) == len(feature_vector):
-            return sum(1 for sv in stored if _cosine_sim(feature_vector, sv) >= similarity_threshold)
-    # Fallback: same risk_level
-    return sum(1 for r in confirmed if r.get("risk_level") == risk_level)
+    levels = [r.get("risk_level") for r in _load() if r.get("decision") == "Confirmed Fraud"]
+    return _similar("Confirmed Fraud", levels, risk_level, _query(feature_vector), similarity_threshold)
 
 
 def get_similar_false_positive_count(
@@ -156,15 +355,72 @@ def get_similar_false_positive_count(
     If feature_vector is provided and we have stored vectors: use cosine similarity (>= threshold).
     Else: fall back to same risk_level count.
     """
-    records = _load()
-    fps = [r for r in records if r.get("decision") == "False Positive"]
-    if not fps:
-        return 0
-    if feature_vector and len(feature_vector) > 0:
-        stored = [r.get("feature_vector") for r in fps if isinstance(r.get("feature_vector"), list)]
-        if stored and len(stored[0]) == len(feature_vector):
-            return sum(1 for sv in stored if _cosine_sim(feature_vector, sv) >= similarity_threshold)
-    return sum(1 for r in fps if r.get("risk_level") == risk_level)
+    levels = [r.get("risk_level") for r in _load() if r.get("decision") == "False Positive"]
+    return _similar("False Positive", levels, risk_level, _query(feature_vector), similarity_threshold)
+
+
+def get_similar_confirmed_counts(
+    risk_levels: list[str],
+    feature_vectors: list[list[float] | None],
+    *,
+    similarity_threshold: float = 0.7,
+) -> list[int]:
+    """
+    get_similar_confirmed_count for many alerts at once: the stored confirmed-fraud matrix is
+    compared with every query vector in one matrix product (or the numba kernel per query). Items without a usable vector fall
+    back to the same risk_level count.
+    """
+    confirmed = [r.get("risk_level") for r in _load() if r.get("decision") == "Confirmed Fraud"]
+    if not confirmed:
+        return [0] * len(risk_levels)
+    out = [confirmed.count(level) for level in risk_levels]
+    index = _stored_vectors("Confirmed Fraud")
+    if index is None:
+        return out
+    M, norms = index
+    dim = M.shape[1]
+    rows = [k for k, fv in enumerate(feature_vectors) if fv and len(fv) == dim]
+    if rows and HAS_NUMBA:
+        # Same kernel as _count_similar so single and batch counts agree at the threshold
+        thr = float(similarity_threshold)
+        for k in rows:
+            q = np.asarray(feature_vectors[k], dtype=np.float64)
+            out[k] = int(_batched_cosine_ge(M, norms, q, float(np.linalg.norm(q)), thr))
+    elif rows:
+        Q = np.asarray([feature_vectors[k] for k in rows], dtype=np.float64)
+        denom = np.linalg.norm(Q, axis=1)[:, None] * norms[None, :]
+        ok = (norms >= 1e-9)[None, :] & (denom >= 1e-9)
+        sims = np.zeros(denom.shape)
+        np.divide(Q @ M.T, denom, out=sims, where=ok)
+        counts = (np.clip(sims, 0.0, 1.0) >= similarity_threshold).sum(axis=1)
+        for k, n in zip(rows, counts.tolist()):
+            out[k] = n
+    return out
+
+
+def get_similarity_counts(
+    risk_level: str,
+    *,
+    feature_vector: list[float] | None = None,
+    similarity_threshold: float = 0.7,
+) -> tuple[int, int]:
+    """
+    (similar confirmed fraud count, similar false positive count) from a single pass over the
+    records and one query vector; same rules as get_similar_confirmed_count /
+    get_similar_false_positive_count.
+    """
+    confirmed, fps = [], []
+    for r in _load():
+        decision = r.get("decision")
+        if decision == "Confirmed Fraud":
+            confirmed.append(r.get("risk_level"))
+        elif decision == "False Positive":
+            fps.append(r.get("risk_level"))
+    q = _query(feature_vector)
+    return (
+        _similar("Confirmed Fraud", confirmed, risk_level, q, similarity_threshold),
+        _similar("False Positive", fps, risk_level, q, similarity_threshold),
+    )
 
 
 def get_confirmed_fraud_count() -> int:
@@ -6,36 +6,60 @@ otherwise falls back to CSV-based in-memory mappings. Same {nodes, edges} format
 """
 from __future__ import annotations
 
+import functools
+import json
 import os
+import threading
+import time
 from pathlib import Path
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 UNLABELED_CSV = DATA_DIR / "unlabeled_fraud_dataset.csv"
 SYNTHETIC_CSV = DATA_DIR / "synthetic_fraud_dataset.csv"
 
 _neo4j_driver = None
+_neo4j_driver_lock = threading.Lock()
 
 
 def _get_neo4j_driver():
-    """Lazy-init Neo4j driver from NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD. Returns None if not configured or import/connect fails."""
+    """
+    Lazy-init the process-wide Neo4j driver from NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD (one pooled
+    driver shared by all Streamlit sessions). Connectivity is only verified up front when
+    VERIFY_NEO4J=1; otherwise a dead server surfaces as a failed query and the CSV fallback.
+    Returns None if not configured or import/connect fails.
+    """
     global _neo4j_driver
     if _neo4j_driver is not None:
         return _neo4j_driver
     if not os.environ.get("NEO4J_URI"):
         return None
-    try:
-        from neo4j import GraphDatabase
-        uri = os.environ.get("NEO4J_URI", "bolt://localhost:7687")
-        user = os.environ.get("NEO4J_USER", "neo4j")
-        password = os.environ.get("NEO4J_PASSWORD", "password")
-        _neo4j_driver = GraphDatabase.driver(uri, auth=(user, password))
-        _neo4j_driver.verify_connectivity()
-        return _neo4j_driver
-    except Exception:
-        _neo4j_driver = None
-        return None
+    with _neo4j_driver_lock:
+        if _neo4j_driver is not None:
+            return _neo4j_driver
+        try:
+            from neo4j import GraphDatabase
+            uri = os.environ.get("NEO4J_URI", "bolt://localhost:7687")
+            user = os.environ.get("NEO4J_USER", "neo4j")
+            password = os.environ.get("NEO4J_PASSWORD", "password")
+            driver = GraphDatabase.driver(
+                uri,
+                auth=(user, password),
+                max_connection_pool_size=32,
+                connection_acquisition_timeout=5,
+                connection_timeout=5,
+                keep_alive=True,
+            )
+            if os.environ.get("VERIFY_NEO4J", "0") == "1":
+                driver.verify_connectivity()
+            _neo4j_driver = driver
+            return _neo4j_driver
+        except Exception:
+            _neo4j_driver = None
+            return None
 
 
 def _node_prop(node, key: str):
@@ -50,7 +74,10 @@ def _node_prop(node, key: str):
 
 
 def _neo4j_record_to_graph(record, account_id: str) -> dict:
-    """Convert Neo4j query record to frontend format {nodes, edges}. Record has a, devices, ips, linked_accounts."""
+    """
+    Convert Neo4j query record to frontend format {nodes, edges}. Record has a, devices, ips,
+    linked_accounts and the [account_id, device_id] / [account_id, ip_id] pairs dev_edges, ip_edges.
+    """
     nodes: list[dict] = []
     edges: list[dict] = []
 
@@ -90,186 +117,279 @@ def _neo4j_record_to_graph(record, account_id: str) -> dict:
     for oid in sorted(other_ids):
         nodes.append({"id": oid, "label": oid, "type": "other_account"})
 
-    # Edges: need (account, device) and (account, ip) for primary + linked in subgraph
-    account_ids = {aid} | other_ids
+    # Edges: (account, device) and (account, ip) pairs for primary + linked, returned by the same query
     seen_edges: set[tuple[str, str]] = set()
-
-    driver = _get_neo4j_driver()
-    if driver and (device_ids or ip_ids):
-        with driver.session() as session:
-            if device_ids:
-                r = session.run(
-                    """
-                    MATCH (a:Account)-[:USES_DEVICE]->(d:Device)
-                    WHERE a.account_id IN $account_ids AND d.device_id IN $device_ids
-                    RETURN a.account_id AS aid, d.device_id AS did
-                    """,
-                    account_ids=list(account_ids),
-                    device_ids=list(device_ids),
-                )
-                for rec in r:
-                    a_id = rec.get("aid")
-                    d_id = rec.get("did")
-                    if a_id and d_id and (a_id, d_id) not in seen_edges:
-                        seen_edges.add((a_id, d_id))
-                        edges.append({"source": a_id, "target": d_id, "relationship": "uses device"})
-            if ip_ids:
-                r = session.run(
-                    """
-                    MATCH (a:Account)-[:LOGGED_FROM]->(i:IP)
-                    WHERE a.account_id IN $account_ids AND i.ip_id IN $ip_ids
-                    RETURN a.account_id AS aid, i.ip_id AS iid
-                    """,
-                    account_ids=list(account_ids),
-                    ip_ids=list(ip_ids),
-                )
-                for rec in r:
-                    a_id = rec.get("aid")
-                    i_id = rec.get("iid")
-                    if a_id and i_id and (a_id, i_id) not in seen_edges:
-                        seen_edges.add((a_id, i_id))
-                        edges.append({"source": a_id, "target": i_id, "relationship": "logged from"})
+    for key, ids, relationship in (
+        ("dev_edges", device_ids, "uses device"),
+        ("ip_edges", ip_ids, "logged from"),
+    ):
+        for pair in record.get(key) or []:
+            a_id, t_id = (pair[0], pair[1]) if pair and len(pair) == 2 else (None, None)
+            if a_id and t_id and str(t_id) in ids and (a_id, t_id) not in seen_edges:
+                seen_edges.add((a_id, t_id))
+                edges.append({"source": a_id, "target": t_id, "relationship": relationship})
 
     return {"nodes": nodes, "edges": edges}
 
 
+_ACCOUNT_NETWORK_QUERY = """
+    MATCH (a:Account {account_id: $account_id})
+    OPTIONAL MATCH (a)-[:USES_DEVICE]->(d:Device)<-[:USES_DEVICE]-(other:Account)
+    OPTIONAL MATCH (a)-[:LOGGED_FROM]->(ip:IP)<-[:LOGGED_FROM]-(other2:Account)
+    WITH a,
+         collect(DISTINCT d) AS devices,
+         collect(DISTINCT ip) AS ips,
+         collect(DISTINCT other) + collect(DISTINCT other2) AS linked_accounts
+    WITH a, devices, ips, linked_accounts, [a] + linked_accounts AS accts
+    CALL {
+        WITH accts, devices
+        UNWIND accts AS x
+        MATCH (x)-[:USES_DEVICE]->(d2:Device)
+        WHERE d2 IN devices
+        RETURN collect(DISTINCT [x.account_id, d2.device_id]) AS dev_edges
+    }
+    CALL {
+        WITH accts, ips
+        UNWIND accts AS x
+        MATCH (x)-[:LOGGED_FROM]->(i2:IP)
+        WHERE i2 IN ips
+        RETURN collect(DISTINCT [x.account_id, i2.ip_id]) AS ip_edges
+    }
+    RETURN a, devices, ips, linked_accounts, dev_edges, ip_edges
+"""
+
+
+def _read_account_network(tx, account_id: str) -> dict | None:
+    """Read transaction function: the account's subgraph record (nodes + edge pairs) as a dict."""
+    record = tx.run(_ACCOUNT_NETWORK_QUERY, account_id=account_id).single()
+    return dict(record) if record else None
+
+
 def _get_account_network_neo4j(account_id: str) -> dict | None:
-    """Return graph from Neo4j or None on any failure."""
+    """Return graph from Neo4j or None on any failure. One session, one managed read transaction."""
     driver = _get_neo4j_driver()
     if not driver:
         return None
     try:
         with driver.session() as session:
-            r = session.run(
-                """
-                MATCH (a:Account {account_id: $account_id})
-                OPTIONAL MATCH (a)-[:USES_DEVICE]->(d:Device)<-[:USES_DEVICE]-(other:Account)
-                OPTIONAL MATCH (a)-[:LOGGED_FROM]->(ip:IP)<-[:LOGGED_FROM]-(other2:Account)
-                WITH a,
-                     collect(DISTINCT d) AS devices,
-                     collect(DISTINCT ip) AS ips,
-                     collect(DISTINCT other) + collect(DISTINCT other2) AS linked_accounts
-                RETURN a, devices, ips, linked_accounts
-                """,
-                account_id=account_id,
-            )
-            record = r.single()
-            if not record:
-                return {"nodes": [{"id": account_id, "label": account_id, "type": "primary_account"}], "edges": []}
-            return _neo4j_record_to_graph(dict(record), account_id)
+            record = session.execute_read(_read_account_network, account_id)
+        if not record:
+            return {"nodes": [{"id": account_id, "label": account_id, "type": "primary_account"}], "edges": []}
+        return _neo4j_record_to_graph(record, account_id)
     except Exception:
         return None
 
 
-def _load_mappings() -> tuple[dict[str, list[tuple[str, str]]], dict[str, list[str]], dict[str, list[str]]]:
+NETWORK_INDEX = DATA_DIR / "network_index.parquet"
+
+# (names, ids, account -> [(device, ip)], device -> [accounts], ip -> [accounts]); every account,
+# device and IP string is interned to an int id (names[id] is the string, id 0 is "" = missing)
+_Mappings = tuple[
+    list[str], dict[str, int], dict[int, list[tuple[int, int]]], dict[int, list[int]], dict[int, list[int]]
+]
+
+# Last _load_mappings result, keyed on both CSVs' mtimes (0 when a file is missing)
+_MAP_CACHE: dict = {"key": None, "value": None}
+
+
+def _mtime_ns(path: Path) -> int:
+    return path.stat().st_mtime_ns if path.exists() else 0
+
+
+def _load_mappings() -> _Mappings:
     """
-    Load account -> (device_id, ip_id), device_id -> [account_ids], ip_id -> [account_ids].
-    Uses unlabeled_fraud_dataset (device_id, ip_address) and synthetic_fraud_dataset (device_id, ip_hash).
+    Load account -> (device_id, ip_id), device_id -> [account_ids], ip_id -> [account_ids], all as
+    int ids into the returned names/ids tables. Uses unlabeled_fraud_dataset (device_id, ip_address) and synthetic_fraud_dataset (device_id, ip_hash).
+    Memoized until either CSV changes; callers must treat the returned dicts as read-only.
+    """
+    key = (_mtime_ns(UNLABELED_CSV), _mtime_ns(SYNTHETIC_CSV))
+    if _MAP_CACHE["key"] != key:
+        build_indices()
+    return _MAP_CACHE["value"]
+
+
+def build_indices(force: bool = False) -> _Mappings:
     """
-    account_devices_ips: dict[str, list[tuple[str, str]]] = {}
-    device_to_accounts: dict[str, list[str]] = {}
-    ip_to_accounts: dict[str, list[str]] = {}
-
-    def add_row(acc, dev, ip_id) -> None:
-        if acc is None or (pd.isna(acc) if hasattr(acc, "__float__") else False):
-            return
-        acc = str(acc).strip()
-        dev = "" if dev is None or (pd.isna(dev) if hasattr(dev, "__float__") else False) else str(dev).strip()
-        ip_id = "" if ip_id is None or (pd.isna(ip_id) if hasattr(ip_id, "__float__") else False) else str(ip_id).strip()
-        if not dev and not ip_id:
-            return
-        account_devices_ips.setdefault(acc, []).append((dev, ip_id))
-        if dev:
-            device_to_accounts.setdefault(dev, []).append(acc)
-        if ip_id:
-            ip_to_accounts.setdefault(ip_id, []).append(acc)
-
-    if UNLABELED_CSV.exists():
+    Build the CSV-mode network mappings and keep them in memory (call once at app startup to pay
+    the cold-start cost up front). The (account_id, device_id, ip_id) rows are snapshotted to
+    NETWORK_INDEX, tagged with the source CSVs' mtimes, so later processes read one columnar file
+    instead of tokenizing both CSVs. A snapshot whose tags don't match the CSVs is rebuilt.
+    """
+    key = (_mtime_ns(UNLABELED_CSV), _mtime_ns(SYNTHETIC_CSV))
+    tag = f"{key[0]}:{key[1]}".encode()
+    pairs = None
+    if not force and NETWORK_INDEX.exists():
         try:
-            df = pd.read_csv(UNLABELED_CSV)
-            for _, row in df.iterrows():
-                add_row(row.get("account_id"), row.get("device_id"), row.get("ip_address"))
+            table = pq.read_table(NETWORK_INDEX, memory_map=True)
+            if (table.schema.metadata or {}).get(b"source_mtimes") == tag:
+                pairs = table.to_pandas()
         except Exception:
-            pass
-
-    if SYNTHETIC_CSV.exists():
+            pairs = None
+    if pairs is None:
+        pairs = _read_pairs()
+        if key != (0, 0):
+            try:
+                table = pa.Table.from_pandas(pairs, preserve_index=False)
+                pq.write_table(table.replace_schema_metadata({b"source_mtimes": tag}), NETWORK_INDEX)
+            except Exception:
+                pass
+    value = _mappings_from_pairs(pairs)
+    _MAP_CACHE.update(key=key, value=value)
+    return value
+
+
+def _read_pairs() -> pd.DataFrame:
+    """Raw (account_id, device_id, ip_id) string rows from both CSVs ("" for missing cells)."""
+    frames = []
+    for csv_path, ip_col in ((UNLABELED_CSV, "ip_address"), (SYNTHETIC_CSV, "ip_hash")):
+        if not csv_path.exists():
+            continue
         try:
-            df = pd.read_csv(SYNTHETIC_CSV)
-            for _, row in df.iterrows():
-                add_row(row.get("account_id"), row.get("device_id"), row.get("ip_hash"))
+            # dtype=str + na_filter=False: every cell is a plain string ("" for missing), no NaN checks per cell
+            df = pd.read_csv(
+                csv_path, usecols=["account_id", "device_id", ip_col], dtype=str, na_filter=False
+            )
         except Exception:
-            pass
+            continue
+        frames.append(df.rename(columns={ip_col: "ip_id"})[["account_id", "device_id", "ip_id"]])
+    if not frames:
+        return pd.DataFrame({"account_id": [], "device_id": [], "ip_id": []}, dtype=str)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _mappings_from_pairs(pairs: pd.DataFrame) -> _Mappings:
+    """Build the _load_mappings tables from (account_id, device_id, ip_id) rows."""
+    names: list[str] = [""]
+    ids: dict[str, int] = {"": 0}
+    account_devices_ips: dict[int, list[tuple[int, int]]] = {}
+    device_to_accounts: dict[int, list[int]] = {}
+    ip_to_accounts: dict[int, list[int]] = {}
+
+    def intern(value: str) -> int:
+        i = ids.get(value)
+        if i is None:
+            i = ids[value] = len(names)
+            names.append(value)
+        return i
+
+    # Strip and filter column-wise once; the loop below only interns and appends
+    acc_s, dev_s, ip_s = (pairs[c].astype(str).str.strip() for c in ("account_id", "device_id", "ip_id"))
+    keep = (acc_s != "") & ((dev_s != "") | (ip_s != ""))
+    for acc, dev, ip_id in zip(acc_s[keep].tolist(), dev_s[keep].tolist(), ip_s[keep].tolist()):
+        a, d, i = intern(acc), intern(dev), intern(ip_id)
+        account_devices_ips.setdefault(a, []).append((d, i))
+        if d:
+            device_to_accounts.setdefault(d, []).append(a)
+        if i:
+            ip_to_accounts.setdefault(i, []).append(a)
 
-    return account_devices_ips, device_to_accounts, ip_to_accounts
+    return names, ids, account_devices_ips, device_to_accounts, ip_to_accounts
 
 
 # Cap on linked accounts in CSV fallback so the graph stays readable (avoids dense balls)
 _MAX_OTHER_ACCOUNTS_CSV = 18
 
 
+SUBGRAPH_INDEX = DATA_DIR / "subgraphs.parquet"
+
+# account_id -> serialized CSV-mode graph from SUBGRAPH_INDEX, keyed on both CSVs' mtimes
+_SUBGRAPH_CACHE: dict = {"key": None, "value": None}
+
+
+def _load_subgraphs() -> dict[str, str]:
+    """
+    Precomputed graphs written by backend/scripts/build_subgraph_index.py, or {} when the index
+    is missing or was built from different CSVs (its source_mtimes tag doesn't match).
+    """
+    key = (_mtime_ns(UNLABELED_CSV), _mtime_ns(SYNTHETIC_CSV))
+    if _SUBGRAPH_CACHE["key"] != key:
+        value: dict[str, str] = {}
+        if SUBGRAPH_INDEX.exists():
+            try:
+                table = pq.read_table(SUBGRAPH_INDEX, memory_map=True)
+                if (table.schema.metadata or {}).get(b"source_mtimes") == f"{key[0]}:{key[1]}".encode():
+                    value = dict(zip(table.column("account_id").to_pylist(), table.column("graph").to_pylist()))
+            except Exception:
+                value = {}
+        _SUBGRAPH_CACHE.update(key=key, value=value)
+    return _SUBGRAPH_CACHE["value"]
+
+
 def _get_account_network_csv(account_id: str) -> dict:
-    """CSV-based implementation (fallback when Neo4j is not available)."""
+    """CSV-based implementation (fallback when Neo4j is not available); precomputed graph when indexed."""
+    account_id = str(account_id).strip()
+    cached = _load_subgraphs().get(account_id)
+    if cached is not None:
+        return json.loads(cached)
+    return build_account_network_csv(account_id)
+
+
+def build_account_network_csv(account_id: str) -> dict:
+    """Compute the CSV-mode graph for one account from the in-memory mappings."""
     account_id = str(account_id).strip()
     nodes: list[dict] = []
     edges: list[dict] = []
 
-    account_devices_ips, device_to_accounts, ip_to_accounts = _load_mappings()
-
-    if account_id not in account_devices_ips:
-        nodes.append({"id": account_id, "label": account_id, "type": "primary_account"})
-        return {"nodes": nodes, "edges": edges}
+    names, ids, account_devices_ips, device_to_accounts, ip_to_accounts = _load_mappings()
 
     nodes.append({"id": account_id, "label": account_id, "type": "primary_account"})
+    primary = ids.get(account_id)
+    if primary is None or primary not in account_devices_ips:
+        return {"nodes": nodes, "edges": edges}
 
-    primary_pairs = account_devices_ips[account_id]
-    devices_used: set[str] = set()
-    ips_used: set[str] = set()
-    for d, i in primary_pairs:
+    by_name = names.__getitem__
+    devices_used: set[int] = set()
+    ips_used: set[int] = set()
+    for d, i in account_devices_ips[primary]:
         if d:
             devices_used.add(d)
         if i:
             ips_used.add(i)
 
-    other_accounts: set[str] = set()
+    other_accounts: set[int] = set()
     for dev in devices_used:
-        for acc in device_to_accounts.get(dev, []):
-            if acc != account_id:
-                other_accounts.add(acc)
+        other_accounts.update(device_to_accounts.get(dev, ()))
     for ip in ips_used:
-        for acc in ip_to_accounts.get(ip, []):
-            if acc != account_id:
-                other_accounts.add(acc)
+        other_accounts.update(ip_to_accounts.get(ip, ()))
+    other_accounts.discard(primary)
 
-    truncated = len(other_accounts) > _MAX_OTHER_ACCOUNTS_CSV
+    # Sorted by account_id string, as before the ids were interned
+    others = sorted(other_accounts, key=by_name)
+    truncated = len(others) > _MAX_OTHER_ACCOUNTS_CSV
     if truncated:
-        other_accounts = set(sorted(other_accounts)[:_MAX_OTHER_ACCOUNTS_CSV])
+        others = others[:_MAX_OTHER_ACCOUNTS_CSV]
 
-    all_devices: set[str] = set(devices_used)
-    all_ips: set[str] = set(ips_used)
-    for acc in other_accounts:
-        for d, i in account_devices_ips.get(acc, []):
+    all_devices: set[int] = set(devices_used)
+    all_ips: set[int] = set(ips_used)
+    for acc in others:
+        for d, i in account_devices_ips.get(acc, ()):
             if d:
                 all_devices.add(d)
             if i:
                 all_ips.add(i)
 
-    for acc in sorted(other_accounts):
-        nodes.append({"id": acc, "label": acc, "type": "other_account"})
-    for dev in sorted(all_devices):
-        nodes.append({"id": dev, "label": dev, "type": "device"})
-    for ip in sorted(all_ips):
-        nodes.append({"id": ip, "label": ip, "type": "ip"})
-
-    accounts_in_graph = {account_id} | other_accounts
-    seen: set[tuple[str, str]] = set()
-    for acc in accounts_in_graph:
-        for d, i in account_devices_ips.get(acc, []):
-            if d and d in all_devices and (acc, d) not in seen:
-                seen.add((acc, d))
-                edges.append({"source": acc, "target": d, "relationship": "uses device"})
-            if i and i in all_ips and (acc, i) not in seen:
-                seen.add((acc, i))
-                edges.append({"source": acc, "target": i, "relationship": "logged from"})
+    for acc in others:
+        name = names[acc]
+        nodes.append({"id": name, "label": name, "type": "other_account"})
+    for dev in sorted(all_devices, key=by_name):
+        name = names[dev]
+        nodes.append({"id": name, "label": name, "type": "device"})
+    for ip in sorted(all_ips, key=by_name):
+        name = names[ip]
+        nodes.append({"id": name, "label": name, "type": "ip"})
+
+    # Edge dedup on (account, target) ids packed into one int
+    seen: set[int] = set()
+    for acc in [primary, *others]:
+        src = names[acc]
+        hi = acc << 32
+        for d, i in account_devices_ips.get(acc, ()):
+            if d and d in all_devices and (hi | d) not in seen:
+                seen.add(hi | d)
+                edges.append({"source": src, "target": names[d], "relationship": "uses device"})
+            if i and i in all_ips and (hi | i) not in seen:
+                seen.add(hi | i)
+                edges.append({"source": src, "target": names[i], "relationship": "logged from"})
 
     out = {"nodes": nodes, "edges": edges}
     if truncated:
@@ -278,16 +398,31 @@ def _get_account_network_csv(account_id: str) -> dict:
     return out
 
 
+# Neo4j-mode results are reused for this many seconds (the graph can change under us)
+_NEO4J_CACHE_TTL = 300
+
+
+@functools.lru_cache(maxsize=256)
+def _get_account_network_cached(account_id: str, cache_key: tuple) -> dict:
+    """get_account_network body; cache_key only partitions the LRU (CSV mtimes or a Neo4j TTL bucket)."""
+    result = _get_account_network_neo4j(account_id)
+    if result is not None:
+        return result
+    return _get_account_network_csv(account_id)
+
+
 def get_account_network(account_id: str) -> dict:
     """
     Build graph for the given account: nodes (primary_account, other_account, device, ip)
     and edges (account -> device, account -> ip). Uses Neo4j when configured and available;
-    otherwise falls back to CSV-based data.
+    otherwise falls back to CSV-based data. Results are LRU-cached per account until the CSVs
+    change (CSV mode) or for _NEO4J_CACHE_TTL seconds (Neo4j mode); treat them as read-only.
 
     Returns:
         {"nodes": [{"id", "label", "type"}], "edges": [{"source", "target", "relationship"}]}
     """
-    result = _get_account_network_neo4j(str(account_id).strip())
-    if result is not None:
-        return result
-    return _get_account_network_csv(account_id)
+    if os.environ.get("NEO4J_URI"):
+        cache_key = ("neo4j", int(time.monotonic() // _NEO4J_CACHE_TTL))
+    else:
+        cache_key = ("csv", _mtime_ns(UNLABELED_CSV), _mtime_ns(SYNTHETIC_CSV))
+    return _get_account_network_cached(str(account_id).strip(), cache_key)
@@ -7,7 +7,7 @@ Score and explanation are attached to each alert for audit.
 """
 from __future__ import annotations
 
-from backend.services.feedback import get_similar_confirmed_count, get_similar_false_positive_count
+from backend.services.feedback import get_similarity_counts
 
 # Auditable constants for priority formula
 PRIORITY_BOOST_PER_CONFIRMED = 0.05
@@ -35,8 +35,7 @@ def compute_outcome_adjusted_priority(alert: dict) -> dict:
     risk_level = alert.get("risk_level") or "Low"
     feature_vector = alert.get("feature_vector")
 
-    similar_confirmed = get_similar_confirmed_count(risk_level, feature_vector=feature_vector)
-    similar_fp = get_similar_false_positive_count(risk_level, feature_vector=feature_vector)
+    similar_confirmed, similar_fp = get_similarity_counts(risk_level, feature_vector=feature_vector)
 
     boost = 0.0
     if similar_confirmed > 0:
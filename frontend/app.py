@@ -5,8 +5,15 @@ Layout: page title at top | left sidebar (alert queue) | main area (case details
 Alert queue: risk badge, fraud %, one-line AI explanation; sorted by risk; select to load case.
 Run: streamlit run app.py  (from project root: streamlit run frontend/app.py)
 """
+import hashlib
+import json
+import math
 import os
 import sys
+import time
+from collections import OrderedDict
+from functools import partial
+from operator import itemgetter
 from pathlib import Path
 
 # Load .env from project root so OPENAI_API_KEY / GOOGLE_API_KEY are set for LLM calls
@@ -19,93 +26,37 @@ if _env_file.exists():
     except ImportError:
         pass
 
+import pyarrow as pa
 import streamlit as st
 
-# Optional: pyvis for network graph (Network tab)
+# Optional: diskcache persists agent pipeline results across sessions/restarts (else per-session only)
 try:
-    from pyvis.network import Network
-    HAS_PYVIS = True
+    import diskcache
+    HAS_DISKCACHE = True
 except ImportError:
-    HAS_PYVIS = False
-
-def _build_network_graph_html(
-    account_id: str,
-    devices: list[dict],
-    ips: list[dict],
-    height: int = 400,
-) -> str | None:
-    """
-    Build an interactive network graph: center node = account, connected = devices & IPs.
-    Highlights nodes linked to confirmed fraud. Hover for labels.
-    Returns HTML string for st.components.v1.html, or None if pyvis not available.
-    """
-    if not HAS_PYVIS:
-        return None
-    net = Network(
-        height=f"{height}px",
-        width="100%",
-        notebook=False,
-        heading="",
-        cdn_resources="remote",
-    )
-    net.barnes_hut(
-        gravity=0.2,
-        central_gravity=0.3,
-        spring_length=150,
-        spring_strength=0.05,
-        damping=0.09,
-    )
-    # Center node: current account
-    net.add_node(
-        account_id,
-        label=account_id,
-        title=f"Current account\n{account_id}",
-        color="#1a73e8",
-        size=35,
-        font={"size": 14},
-    )
-    # Device nodes (red if fraud-linked, else gray)
-    for d in devices:
-        nid = d.get("id", "?")
-        fraud = d.get("fraud_linked", False)
-        acc_count = d.get("accounts", 0)
-        title = f"Device: {nid}\nAccounts: {acc_count}\n{'Linked to confirmed fraud' if fraud else 'No fraud link'}"
-        net.add_node(
-            nid,
-            label=nid,
-            title=title,
-            color="#c62828" if fraud else "#78909c",
-            size=25,
-            font={"size": 12},
-            shape="box",
-        )
-        net.add_edge(account_id, nid, title="uses device")
-    # IP nodes (red if fraud-linked, else gray)
-    for ip in ips:
-        nid = ip.get("id", "?")
-        fraud = ip.get("fraud_linked", False)
-        acc_count = ip.get("accounts", 0)
-        title = f"IP: {nid}\nAccounts: {acc_count}\n{'Linked to confirmed fraud' if fraud else 'No fraud link'}"
-        net.add_node(
-            nid,
-            label=nid,
-            title=title,
-            color="#c62828" if fraud else "#78909c",
-            size=25,
-            font={"size": 12},
-            shape="dot",
-        )
-        net.add_edge(account_id, nid, title="logged from")
+    HAS_DISKCACHE = False
+
+
+def _pyvis_network():
+    """Optional pyvis for the network graph (Network tab): its Network class, imported on first use; None if not installed."""
     try:
-        import tempfile
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".html", delete=False) as f:
-            tmp = f.name
-        net.save_graph(tmp)
-        html = Path(tmp).read_text()
-        Path(tmp).unlink(missing_ok=True)
-        return html
-    except Exception:
+        from pyvis.network import Network
+    except ImportError:
         return None
+    return Network
+
+
+# vis.js stalls well before ~1500 nodes; above this the Network tab lists nodes instead of drawing them
+_MAX_GRAPH_NODES = 500
+# Cached graph pages embed vis.js inline (~700 KB each); bound how many the builder keeps
+_GRAPH_CACHE_ENTRIES = 128
+
+
+def _fixed_height_html(html: str, height: int) -> str:
+    """Wrap the pyvis page body in a fixed-height box so the components iframe (same height) never reflows."""
+    return html.replace("<body>", f'<body><div style="height:{height}px;overflow:hidden">', 1).replace(
+        "</body>", "</div></body>", 1
+    )
 
 
 def _short_node_label(full_label: str, max_chars: int = 10) -> str:
@@ -119,22 +70,28 @@ def _short_node_label(full_label: str, max_chars: int = 10) -> str:
     return full_label[: max_chars - 2] + ".." if len(full_label) > max_chars else full_label
 
 
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=_GRAPH_CACHE_ENTRIES)
 def _build_network_graph_html_from_graph(graph: dict, height: int = 400) -> str | None:
     """
     Build interactive network from backend graph with fixed hierarchical layout:
     level 0 = primary account, level 1 = devices & IPs, level 2 = linked accounts.
     Physics disabled so the graph is stable and not jumbled.
+    Cached on the graph's content, so reruns for the same account skip pyvis entirely.
+    Returns a short notice instead of a graph above _MAX_GRAPH_NODES nodes.
     """
-    if not HAS_PYVIS:
-        return None
     nodes = graph.get("nodes", [])
     edges = graph.get("edges", [])
+    if len(nodes) > _MAX_GRAPH_NODES:
+        return "<em>Graph omitted (too many linked nodes; use table view).</em>"
+    Network = _pyvis_network()
+    if Network is None:
+        return None
     net = Network(
         height=f"{height}px",
         width="100%",
         notebook=False,
         heading="",
-        cdn_resources="remote",
+        cdn_resources="in_line",  # vis.js embedded: no CDN fetch per iframe load
     )
     net.set_options(
         """
@@ -146,8 +103,11 @@ def _build_network_graph_html_from_graph(graph: dict, height: int = 400) -> str
               "levelSeparation": 120,
               "nodeSpacing": 100,
               "sortMethod": "directed"
-            }
+            },
+            "improvedLayout": false
           },
+          "interaction": { "hideEdgesOnDrag": true, "hideEdgesOnZoom": true, "tooltipDelay": 200 },
+          "edges": { "smooth": false },
           "physics": { "enabled": false }
         }
         """
@@ -174,13 +134,7 @@ def _build_network_graph_html_from_graph(graph: dict, height: int = 400) -> str
         if src and tgt:
             net.add_edge(src, tgt, title=rel)
     try:
-        import tempfile
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".html", delete=False) as f:
-            tmp = f.name
-        net.save_graph(tmp)
-        html = Path(tmp).read_text()
-        Path(tmp).unlink(missing_ok=True)
-        return html
+        return _fixed_height_html(net.generate_html(notebook=False), height)
     except Exception:
         return None
 
@@ -190,11 +144,23 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from backend.agents import run_pipeline, run_knowledge_capture, run_visualization_agent
+from backend.explainability.next_step_advisor import recommend_next_steps
+from backend.explainability.report_writer import generate_regulatory_report, is_llm_required_report
 from backend.explainability.visualization_tool import spec_to_mermaid
 from backend.services.alerts import get_alerts
-from backend.services.evidence import get_transactions, get_geo_activity, get_identity_signals, get_network_signals
-from backend.services.feedback import add_decision, add_knowledge_pattern, get_similar_confirmed_count, has_false_positive_history
+from backend.services.evidence import get_evidence_tables
+from backend.services.feedback import (
+    add_decision,
+    add_knowledge_pattern,
+    get_similar_confirmed_count,
+    get_similar_confirmed_counts,
+    has_false_positive_history,
+)
 from backend.services.network import get_account_network
+from frontend.styles import get_app_css
+from frontend.utils.agents import agent_error_message
+from frontend.utils.alerts import AlertFields, alert_fields
+from frontend.utils.markup import bullets_html, escape_html, summary_html
 
 st.set_page_config(
     page_title="Fraud Investigation Dashboard",
@@ -216,131 +182,9 @@ if st.session_state.get("api_key_openai", "").strip():
 # -----------------------------------------------------------------------------
 # Global styles (smooth dark theme, refined cards, typography)
 # -----------------------------------------------------------------------------
-st.markdown("""
-<style>
-  /* Base app background */
-  .stApp {
-    background: #0d1117;
-    min-height: 100vh;
-  }
-  /* Right side (main content) – diagonal gradient + soft amber & rose orbs */
-  main, [data-testid="stAppViewContainer"] > section, [data-testid="stAppViewContainer"] > div:last-child {
-    background: radial-gradient(ellipse 100% 70% at 15% 20%, rgba(251, 191, 36, 0.07) 0%, transparent 50%),
-                radial-gradient(ellipse 90% 60% at 90% 80%, rgba(244, 114, 182, 0.06) 0%, transparent 45%),
-                linear-gradient(145deg, #0f1419 0%, #171a1f 35%, #1c1917 70%, #141a22 100%);
-    min-height: 100vh;
-  }
-  /* Sidebar – previous colour: soft blue/green ambient gradient (as before right-side-only change) */
-  [data-testid="stSidebar"] {
-    background: radial-gradient(ellipse 90% 60% at 75% 15%, rgba(56, 139, 253, 0.035) 0%, transparent 50%),
-                radial-gradient(ellipse 70% 50% at 15% 85%, rgba(46, 213, 115, 0.025) 0%, transparent 50%),
-                linear-gradient(165deg, #0d1117 0%, #161b22 45%, #1c2128 100%);
-    border-right: 1px solid rgba(48, 54, 61, 0.6);
-  }
-  [data-testid="stSidebar"] .stMarkdown { color: #e6edf3; }
-  /* Cards – frosted feel, softer shadow, larger radius */
-  .fraud-card {
-    background: rgba(22, 27, 34, 0.88);
-    border: 1px solid rgba(48, 54, 61, 0.7);
-    border-radius: 16px;
-    padding: 1.35rem 1.6rem;
-    margin: 0.85rem 0;
-    box-shadow: 0 4px 24px rgba(0, 0, 0, 0.25), 0 1px 0 rgba(255, 255, 255, 0.03) inset;
-    transition: box-shadow 0.2s ease, border-color 0.2s ease;
-  }
-  .fraud-card:hover { box-shadow: 0 8px 32px rgba(0, 0, 0, 0.3), 0 1px 0 rgba(255, 255, 255, 0.04) inset; }
-  .fraud-card-title {
-    font-size: 0.8rem; font-weight: 600; color: #8b949e;
-    letter-spacing: 0.06em; text-transform: uppercase; margin-bottom: 0.5rem;
-  }
-  .fraud-metric-value { font-size: 1.75rem; font-weight: 700; letter-spacing: -0.02em; }
-  /* Headers */
-  h1, h2, h3 { color: #e6edf3 !important; font-weight: 600 !important; }
-  .hero-title {
-    font-size: 2rem; font-weight: 700; color: #e6edf3;
-    letter-spacing: -0.03em; margin-top: 0; margin-bottom: 0.25rem !important;
-    text-shadow: 0 1px 2px rgba(0, 0, 0, 0.2);
-  }
-  .hero-sub {
-    font-size: 0.95rem; color: #8b949e; margin-top: 0; margin-bottom: 1.5rem !important;
-    letter-spacing: 0.01em;
-  }
-  hr { border-color: rgba(48, 54, 61, 0.8) !important; opacity: 0.9; }
-  /* Buttons – smooth radius, clear hover, no awkward wrap; action row buttons fill column */
-  .stButton > button {
-    border-radius: 12px;
-    font-weight: 600;
-    transition: transform 0.2s ease, box-shadow 0.2s ease, background 0.2s ease;
-    white-space: nowrap;
-    min-width: min(100%, 8rem);
-    width: 100%;
-  }
-  .stButton > button:hover {
-    transform: translateY(-2px);
-    box-shadow: 0 6px 20px rgba(0, 0, 0, 0.35);
-  }
-  .stButton > button:active { transform: translateY(0); }
-  /* Primary (e.g. Risk toggle) – slightly lifted */
-  .stButton > button[kind="primary"] {
-    box-shadow: 0 2px 12px rgba(0, 0, 0, 0.25);
-  }
-  /* Metrics */
-  [data-testid="stMetricValue"] { font-size: 1.4rem !important; font-weight: 700 !important; color: #e6edf3 !important; }
-  [data-testid="stMetricLabel"] { color: #8b949e !important; }
-  /* Tabs – pill style, more padding/gap so labels aren't cramped */
-  .stTabs [data-baseweb="tab-list"] {
-    background: rgba(33, 38, 45, 0.9);
-    border-radius: 12px;
-    padding: 10px 14px;
-    gap: 12px;
-    border: 1px solid rgba(48, 54, 61, 0.5);
-  }
-  .stTabs [data-baseweb="tab"] {
-    background: transparent;
-    border-radius: 10px;
-    color: #8b949e;
-    padding: 8px 16px;
-    min-height: 2.5rem;
-    transition: background 0.2s ease, color 0.2s ease;
-  }
-  .stTabs [aria-selected="true"] {
-    background: rgba(48, 54, 61, 0.8) !important;
-    color: #e6edf3 !important;
-    box-shadow: 0 2px 8px rgba(0, 0, 0, 0.2);
-  }
-  /* Space between tab bar and tab content */
-  .stTabs [data-baseweb="tab-panel"] {
-    padding-top: 1.25rem;
-  }
-  /* Expanders */
-  .streamlit-expanderHeader {
-    background: rgba(33, 38, 45, 0.8);
-    border-radius: 10px;
-    border: 1px solid rgba(48, 54, 61, 0.4);
-  }
-  /* DataFrames */
-  .stDataFrame {
-    border-radius: 12px;
-    overflow: hidden;
-    border: 1px solid rgba(48, 54, 61, 0.6);
-    box-shadow: 0 2px 12px rgba(0, 0, 0, 0.15);
-  }
-  /* Section labels – more space below so content isn't cramped */
-  .section-label {
-    font-size: 0.8rem; font-weight: 600; color: #8b949e;
-    letter-spacing: 0.05em; text-transform: uppercase;
-    margin-bottom: 0.85rem;
-  }
-  /* Selectbox / inputs – rounded, subtle border */
-  .stSelectbox > div, [data-testid="stSelectbox"] > div {
-    border-radius: 10px;
-  }
-  /* Block container – enough top padding so "Internal use" and hero are not cut off */
-  .block-container { padding-top: 2.75rem; padding-bottom: 2rem; }
-  /* Main content view – extra top space to avoid clipping */
-  [data-testid="stAppViewContainer"] { padding-top: 0.75rem; }
-</style>
-""", unsafe_allow_html=True)
+# Streamlit drops elements that a rerun doesn't emit, so the style tag is re-sent every run;
+# the CSS itself lives in frontend/styles.css and is read from disk once per process.
+st.markdown(get_app_css(), unsafe_allow_html=True)
 
 # -----------------------------------------------------------------------------
 # Page title (hero) — logo is in sidebar
@@ -354,8 +198,135 @@ st.markdown(
 # -----------------------------------------------------------------------------
 # Load alerts (fetch more so sort/filter have enough to work with)
 # -----------------------------------------------------------------------------
-_alerts_raw = get_alerts(limit=500)
-alert_by_id = {a["account_id"]: a for a in _alerts_raw}
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_alerts(limit: int = 500) -> tuple[list[dict], dict[str, dict], dict[str, AlertFields], int]:
+    """
+    get_alerts(limit), its account_id index, per-alert AlertFields for the queue's filter/sort, and
+    a load stamp (data version for caches built on them); reused across reruns until the TTL,
+    Refresh, or a new decision.
+    """
+    rows = get_alerts(limit=limit)
+    by_id = {a["account_id"]: a for a in rows}
+    return rows, by_id, {a["account_id"]: alert_fields(a) for a in rows}, time.monotonic_ns()
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_fp_history() -> bool:
+    return has_false_positive_history()
+
+
+_RISK_ORD_HIGH = {"High": 0, "Medium": 1, "Low": 2}
+_RISK_ORD_LOW = {"Low": 0, "Medium": 1, "High": 2}
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _partition_and_sort(
+    alert_ids: tuple[str, ...],
+    statuses: tuple[tuple[str, str], ...],
+    sort_mode: str,
+    sort_risk: str,
+    sort_anomaly: str,
+    filter_risk: str,
+    data_version: int,
+    *,
+    _alert_by_id: dict[str, dict],
+    _fields_by_id: dict[str, AlertFields],
+) -> tuple[list[str], list[str], list[str], list[str]]:
+    """
+    Sidebar queues (alerts, verified fraud, legit, false positives) as sorted account_id lists.
+    Keyed on the alert ids, case statuses, sort/filter settings and the _cached_alerts load stamp
+    (data_version), so reloaded scores re-sort; the underscore args are not hashed.
+    """
+    # Partition by investigator decision (one pass; statuses outside these four are not listed)
+    alerts_list, verified_fraud_list, legit_list, false_positive_list = [], [], [], []
+    list_by_status = {
+        "Under Review": alerts_list,
+        "More Info Requested": alerts_list,
+        "Confirmed Fraud": verified_fraud_list,
+        "Marked Legit": legit_list,
+        "False Positive": false_positive_list,
+    }
+    case_status = dict(statuses)
+    for aid in alert_ids:
+        bucket = list_by_status.get(case_status.get(aid, "Under Review"))
+        if bucket is not None:
+            bucket.append(aid)
+    if filter_risk != "All":
+        alerts_list = [aid for aid in alerts_list if _fields_by_id[aid].risk_level == filter_risk]
+
+    # One key per alert; the four lists below then sort on dict lookups
+    if sort_mode == "Outcome-informed (Learning)":
+        # Alerts without a precomputed priority: one batched similarity call for all of them
+        no_pri = [aid for aid in alert_ids if _fields_by_id[aid].outcome_adjusted_priority is None]
+        similar_n = dict(zip(no_pri, get_similar_confirmed_counts(
+            [_alert_by_id[aid].get("risk_level", "Low") for aid in no_pri],
+            [_alert_by_id[aid].get("feature_vector") for aid in no_pri],
+        ))) if no_pri else {}
+
+        def _sort_key(a: AlertFields, _similar_n=similar_n) -> tuple:
+            pri = a.outcome_adjusted_priority
+            if pri is not None:
+                return (-pri, -a.fraud_probability)
+            return (-_similar_n[a.account_id], -a.fraud_probability)
+    else:
+        risk_ord = _RISK_ORD_HIGH if sort_risk == "High → Low" else _RISK_ORD_LOW
+        prob_sign = -1 if sort_risk == "High → Low" else 1
+        anom_sign = -1 if sort_anomaly == "High → Low" else 1
+
+        # Default args bind the sort settings as locals (LOAD_FAST) for the per-alert calls
+        def _sort_key(a: AlertFields, _rank=risk_ord.get, _ps=prob_sign, _as=anom_sign) -> tuple:
+            return (_rank(a.risk_level, 3), _ps * a.fraud_probability, _as * a.anomaly_score)
+    sort_keys = {aid: _sort_key(f) for aid, f in _fields_by_id.items()}
+
+    def _sort_alerts(ids: list, _keys=sort_keys) -> list:
+        # Decorate-sort-undecorate: tuple keys are compared in C, no per-element Python call
+        decorated = [(_keys[aid], aid) for aid in ids]
+        decorated.sort(key=itemgetter(0))
+        return [aid for _, aid in decorated]
+    return (
+        _sort_alerts(alerts_list),
+        _sort_alerts(verified_fraud_list),
+        _sort_alerts(legit_list),
+        _sort_alerts(false_positive_list),
+    )
+
+
+def _on_feedback_written() -> None:
+    """Decisions feed outcome-adjusted priority and the FP suggestion: drop the caches built on them."""
+    _cached_alerts.clear()
+    _cached_fp_history.clear()
+    _partition_and_sort.clear()
+
+
+_alerts_raw, alert_by_id, _fields_by_id, _alerts_version = _cached_alerts(500)
+
+_AGENT_CACHE_DIR = ROOT / ".agent_cache"
+_AGENT_CACHE_TTL = 24 * 3600
+
+
+@st.cache_resource(show_spinner=False)
+def _agent_disk_cache():
+    return diskcache.Cache(str(_AGENT_CACHE_DIR)) if HAS_DISKCACHE else None
+
+
+def _run_pipeline_cached(alert: dict) -> dict:
+    """
+    run_pipeline(alert, "alert_creation"), reused across sessions for 24h when diskcache is installed.
+    Keyed on the alert's canonical JSON, so any change to its scores/features reruns the agents;
+    results containing an agent error are never persisted.
+    """
+    cache = _agent_disk_cache()
+    key = "alert_creation:" + hashlib.blake2b(
+        json.dumps(alert, sort_keys=True, default=str).encode(), digest_size=16
+    ).hexdigest()
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+    result = run_pipeline(alert, "alert_creation")
+    if cache is not None and not any(isinstance(v, dict) and "_error" in v for v in result.values()):
+        cache.set(key, result, expire=_AGENT_CACHE_TTL)
+    return result
 
 # -----------------------------------------------------------------------------
 # Session state: selected alert, case status, investigator decision
@@ -369,15 +340,87 @@ if "case_status" not in st.session_state:
 def _get_case_status(account_id: str) -> str:
     return st.session_state.case_status.get(account_id, "Under Review")
 
+
+# Per-session caches of LLM output (timeline specs, reports) keep the most recently used cases only
+_SESSION_LRU_SIZE = 32
+
+
+def _lru_put(cache: OrderedDict, key, value) -> None:
+    """Store value as the most recent entry of a session-state OrderedDict, evicting the oldest past _SESSION_LRU_SIZE."""
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > _SESSION_LRU_SIZE:
+        cache.popitem(last=False)
+
 # -----------------------------------------------------------------------------
 # Left sidebar: 3 dropdowns (Alerts, Verified fraud, Legit) — cases move when status changes
 # -----------------------------------------------------------------------------
 _PLACEHOLDER = "— No cases —"
 
-_logo_path = Path(__file__).resolve().parent / "logos" / "Gemini_Generated_Image_ayb0j7ayb0j7ayb0.png"
+# Card HTML, filled with str.format_map on each rerun
+_SELECTED_CARD_TMPL = (
+    '<div class="fraud-card" style="margin-top:1rem; padding:1rem;">'
+    '<p class="fraud-card-title">Selected case</p>'
+    '<p style="margin:0.35rem 0; font-size:0.95rem; color:#e6edf3;"><strong>{account_id}</strong></p>'
+    '<span style="background:{risk_color};color:white;padding:3px 8px;border-radius:6px;font-size:0.75rem;font-weight:600;">{risk_level}</span> '
+    '<span style="font-size:0.9rem; color:#8b949e;">{fraud_probability:.0%}</span>'
+    '<p style="margin:0.5rem 0 0; font-size:0.8rem; color:#8b949e; line-height:1.4;">{explanation}</p>'
+    '{outcome_line}'
+    '</div>'
+)
+_CASE_HEADER_TMPL = (
+    '<div class="fraud-card" style="display:flex; align-items:center; flex-wrap:wrap; gap:2rem;">'
+    '<div><p class="fraud-card-title">Account</p><p style="margin:0; font-size:1.1rem; font-weight:600; color:#e6edf3;">{account_id}</p></div>'
+    '<div><p class="fraud-card-title">Status</p><p style="margin:0; font-size:1rem; font-weight:600; color:{status_color};">{status_label}</p></div>'
+    '<div><p class="fraud-card-title">Risk score</p><p class="fraud-metric-value" style="color:{risk_color}; margin:0;">{risk_pct:.0f}%</p></div>'
+    '</div>'
+)
+_FRAUD_CARD_TMPL = (
+    '<div class="fraud-card">'
+    '<p style="font-size:1.15rem; font-weight:600; color:#e6edf3; margin-bottom:0.75rem;">Why this account was flagged</p>'
+    '<div style="line-height:1.8; font-size:1rem; color:#c9d1d9;">{bullets_html}</div>'
+    '<p style="margin-top:1rem; margin-bottom:0.25rem; font-weight:600; color:{conf_color};">{confidence_label}</p>'
+    '<p style="margin:0; font-size:0.9rem; color:#8b949e;">{confidence_note}</p>'
+    '{priority_line}'
+    '</div>'
+)
+_PRIORITY_LINE_TMPL = '<p style="margin-top:0.5rem; font-size:0.9rem; color:#8b949e;">Priority: {priority} (1 = urgent, 5 = low)</p>'
+_STEPS_CARD_TMPL = (
+    '<div class="fraud-card"><ol style="margin:0; padding-left:1.25rem; color:#c9d1d9; line-height:1.8;">'
+    '{items}</ol>{rationale_line}</div>'
+)
+_STEP_LI_TMPL = '<li style="margin-bottom:0.35rem;">{}</li>'
+_RATIONALE_LINE_TMPL = '<p style="margin-top:0.75rem; margin-bottom:0; font-size:0.85rem; color:#8b949e;">{}</p>'
+
+# (min probability, label, note, color), highest tier first; the last tier catches everything below
+_CONF_TIERS = (
+    (0.6, "High confidence", "The model is fairly confident this case deserves review.", "#c62828"),
+    (0.3, "Medium confidence", "The model sees notable risk; human review is recommended.", "#e65100"),
+    (-math.inf, "Low confidence", "The model flagged this for completeness; may be normal variation.", "#2e7d32"),
+)
+
+
+def _confidence(prob: float) -> tuple[str, str, str]:
+    """(label, note, color) of the first _CONF_TIERS tier prob reaches."""
+    for threshold, label, note, color in _CONF_TIERS:
+        if prob >= threshold:
+            return label, note, color
+    return _CONF_TIERS[-1][1:]  # NaN compares false everywhere
+
+
+_LOGO_PATH = ROOT / "frontend" / "logos" / "Gemini_Generated_Image_ayb0j7ayb0j7ayb0.png"
+
+
+@st.cache_data(show_spinner=False)
+def _logo_bytes() -> bytes | None:
+    """Sidebar logo read once per process (the script body, module constants included, reruns on every interaction)."""
+    return _LOGO_PATH.read_bytes() if _LOGO_PATH.exists() else None
+
+
 with st.sidebar:
-    if _logo_path.exists():
-        st.image(str(_logo_path), use_container_width=True)
+    _logo = _logo_bytes()
+    if _logo:
+        st.image(_logo, use_container_width=True)
         st.markdown("")  # spacing
     with st.expander("API keys", expanded=False):
         st.caption("Set your API key to enable AI features (agents, reports, next steps). Keys are not stored on the server.")
@@ -401,6 +444,7 @@ with st.sidebar:
         '<p style="font-size:0.8rem; color:#8b949e; margin-bottom:1rem;">Filter, sort, and select a case</p>',
         unsafe_allow_html=True,
     )
+    st.button("↻ Refresh alerts", key="btn_refresh_alerts", on_click=_on_feedback_written, help="Reload the alert queue")
     if not _alerts_raw:
         st.warning("No alerts.")
         alerts_list = []
@@ -408,13 +452,6 @@ with st.sidebar:
         legit_list = []
         st.session_state.case_list = []
     else:
-        # Partition by investigator decision
-        all_ids = [a["account_id"] for a in _alerts_raw]
-        alerts_list = [aid for aid in all_ids if _get_case_status(aid) in ("Under Review", "More Info Requested")]
-        verified_fraud_list = [aid for aid in all_ids if _get_case_status(aid) == "Confirmed Fraud"]
-        legit_list = [aid for aid in all_ids if _get_case_status(aid) == "Marked Legit"]
-        false_positive_list = [aid for aid in all_ids if _get_case_status(aid) == "False Positive"]
-
         # Sort state (persist across reruns)
         if "sort_risk" not in st.session_state:
             st.session_state.sort_risk = "High → Low"
@@ -427,19 +464,19 @@ with st.sidebar:
         def _toggle_anomaly():
             st.session_state.sort_anomaly = "Low → High" if st.session_state.sort_anomaly == "High → Low" else "High → Low"
 
-        # Filter and sort mode in expander
+        # Filter and sort mode in expander; batched in a form so the app reruns once, on Apply
         if "sort_mode" not in st.session_state:
             st.session_state.sort_mode = "Risk (High → Low)"
         with st.expander("⚙️ Filter & sort", expanded=False):
-            filter_risk = st.selectbox("Risk filter", ["All", "High", "Medium", "Low"], index=0, key="filter_risk")
-            if filter_risk != "All":
-                alerts_list = [aid for aid in alerts_list if alert_by_id[aid].get("risk_level") == filter_risk]
-            sort_mode = st.selectbox(
-                "Sort by",
-                ["Risk (High → Low)", "Anomaly (High → Low)", "Outcome-informed (Learning)"],
-                index=["Risk (High → Low)", "Anomaly (High → Low)", "Outcome-informed (Learning)"].index(st.session_state.sort_mode),
-                key="sort_mode_select",
-            )
+            with st.form("sidebar_filters", clear_on_submit=False, border=False):
+                filter_risk = st.selectbox("Risk filter", ["All", "High", "Medium", "Low"], index=0, key="filter_risk")
+                sort_mode = st.selectbox(
+                    "Sort by",
+                    ["Risk (High → Low)", "Anomaly (High → Low)", "Outcome-informed (Learning)"],
+                    index=["Risk (High → Low)", "Anomaly (High → Low)", "Outcome-informed (Learning)"].index(st.session_state.sort_mode),
+                    key="sort_mode_select",
+                )
+                st.form_submit_button("Apply")
             st.session_state.sort_mode = sort_mode
 
         # Toggle buttons when sort is Risk or Anomaly
@@ -462,41 +499,18 @@ with st.sidebar:
                 on_click=_toggle_anomaly,
                 help="Anomaly: High→Low" if anom_high_first else "Anomaly: Low→High",
             )
-        risk_order = st.session_state.sort_risk
-        anomaly_order = st.session_state.sort_anomaly
-
-        risk_ord_high = {"High": 0, "Medium": 1, "Low": 2}
-        risk_ord_low = {"Low": 0, "Medium": 1, "High": 2}
-
-        def _sort_alerts(ids: list) -> list:
-            if not ids:
-                return ids
-            if st.session_state.sort_mode == "Outcome-informed (Learning)":
-                def _outcome_key(aid):
-                    a = alert_by_id[aid]
-                    pri = a.get("outcome_adjusted_priority")
-                    if pri is not None:
-                        return (-pri, -a["fraud_probability"])
-                    return (
-                        -get_similar_confirmed_count(a.get("risk_level", "Low"), feature_vector=a.get("feature_vector")),
-                        -a["fraud_probability"],
-                    )
-                return sorted(ids, key=_outcome_key)
-            risk_ord = risk_ord_high if risk_order == "High → Low" else risk_ord_low
-            prob_sign = -1 if risk_order == "High → Low" else 1
-            anom_sign = -1 if anomaly_order == "High → Low" else 1
-            return sorted(
-                ids,
-                key=lambda aid: (
-                    risk_ord.get(alert_by_id[aid]["risk_level"], 3),
-                    prob_sign * alert_by_id[aid]["fraud_probability"],
-                    anom_sign * alert_by_id[aid].get("anomaly_score", 0),
-                ),
-            )
-        alerts_list = _sort_alerts(alerts_list)
-        verified_fraud_list = _sort_alerts(verified_fraud_list)
-        legit_list = _sort_alerts(legit_list)
-        false_positive_list = _sort_alerts(false_positive_list)
+        # Selecting a case reruns the script; the four queues only change with statuses, sort or filter
+        alerts_list, verified_fraud_list, legit_list, false_positive_list = _partition_and_sort(
+            tuple(alert_by_id),
+            tuple(sorted(st.session_state.case_status.items())),
+            st.session_state.sort_mode,
+            st.session_state.sort_risk,
+            st.session_state.sort_anomaly,
+            filter_risk,
+            _alerts_version,
+            _alert_by_id=alert_by_id,
+            _fields_by_id=_fields_by_id,
+        )
 
         def _set_selected(which: str):
             key = f"dd_{which}"
@@ -504,18 +518,19 @@ with st.sidebar:
                 st.session_state.selected_alert_id = st.session_state[key]
 
         st.markdown('<p class="section-label" style="margin-top:0.5rem;">📌 Select a case</p>', unsafe_allow_html=True)
-        opts_alerts = alerts_list if alerts_list else [_PLACEHOLDER]
-        idx_alerts = opts_alerts.index(st.session_state.get("selected_alert_id")) if st.session_state.get("selected_alert_id") in opts_alerts else 0
-        st.selectbox("Alerts", options=opts_alerts, index=idx_alerts, key="dd_alerts", on_change=lambda: _set_selected("alerts"))
-        opts_verified = verified_fraud_list if verified_fraud_list else [_PLACEHOLDER]
-        idx_verified = opts_verified.index(st.session_state.get("selected_alert_id")) if st.session_state.get("selected_alert_id") in opts_verified else 0
-        st.selectbox("Verified fraud", options=opts_verified, index=idx_verified, key="dd_verified", on_change=lambda: _set_selected("verified"))
-        opts_legit = legit_list if legit_list else [_PLACEHOLDER]
-        idx_legit = opts_legit.index(st.session_state.get("selected_alert_id")) if st.session_state.get("selected_alert_id") in opts_legit else 0
-        st.selectbox("Legit", options=opts_legit, index=idx_legit, key="dd_legit", on_change=lambda: _set_selected("legit"))
-        opts_fp = false_positive_list if false_positive_list else [_PLACEHOLDER]
-        idx_fp = opts_fp.index(st.session_state.get("selected_alert_id")) if st.session_state.get("selected_alert_id") in opts_fp else 0
-        st.selectbox("False positives", options=opts_fp, index=idx_fp, key="dd_fp", on_change=lambda: _set_selected("fp"))
+        _current = st.session_state.get("selected_alert_id")
+        for label, which, ids in (
+            ("Alerts", "alerts", alerts_list),
+            ("Verified fraud", "verified", verified_fraud_list),
+            ("Legit", "legit", legit_list),
+            ("False positives", "fp", false_positive_list),
+        ):
+            opts = ids or [_PLACEHOLDER]
+            try:
+                idx = opts.index(_current)  # one scan; a miss selects the first entry
+            except ValueError:
+                idx = 0
+            st.selectbox(label, options=opts, index=idx, key=f"dd_{which}", on_change=partial(_set_selected, which))
 
         # Ordered list for Next case / Previous case navigation
         st.session_state.case_list = alerts_list + verified_fraud_list + legit_list + false_positive_list
@@ -536,19 +551,19 @@ with st.sidebar:
             expl = (sel.get("one_line_explanation") or "")[:60] + "…" if len(sel.get("one_line_explanation") or "") > 60 else (sel.get("one_line_explanation") or "")
             outcome_expl = (sel.get("outcome_priority_explanation") or "").strip()
             if outcome_expl and outcome_expl != "No outcome-based adjustment.":
-                _safe = outcome_expl.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+                _safe = escape_html(outcome_expl)
                 outcome_line = f'<p style="margin:0.35rem 0 0; font-size:0.75rem; color:#79c0ff;">{_safe}</p>'
             else:
                 outcome_line = ""
             st.markdown(
-                f'<div class="fraud-card" style="margin-top:1rem; padding:1rem;">'
-                f'<p class="fraud-card-title">Selected case</p>'
-                f'<p style="margin:0.35rem 0; font-size:0.95rem; color:#e6edf3;"><strong>{chosen}</strong></p>'
-                f'<span style="background:{risk_color};color:white;padding:3px 8px;border-radius:6px;font-size:0.75rem;font-weight:600;">{sel["risk_level"]}</span> '
-                f'<span style="font-size:0.9rem; color:#8b949e;">{sel["fraud_probability"]:.0%}</span>'
-                f'<p style="margin:0.5rem 0 0; font-size:0.8rem; color:#8b949e; line-height:1.4;">{expl}</p>'
-                f'{outcome_line}'
-                f'</div>',
+                _SELECTED_CARD_TMPL.format_map({
+                    "account_id": chosen,
+                    "risk_color": risk_color,
+                    "risk_level": sel["risk_level"],
+                    "fraud_probability": sel["fraud_probability"],
+                    "explanation": expl,
+                    "outcome_line": outcome_line,
+                }),
                 unsafe_allow_html=True,
             )
 
@@ -558,6 +573,201 @@ with st.sidebar:
 # Use session state for selected case everywhere (persists across reruns)
 selected_id = st.session_state.get("selected_alert_id")
 
+# -----------------------------------------------------------------------------
+# Evidence (tabbed): fed by specialist agents
+# -----------------------------------------------------------------------------
+@st.cache_data(ttl=30, show_spinner=False, max_entries=256)
+def _evidence_tables(account_id: str, _alert: dict) -> tuple[pa.Table, ...]:
+    """
+    (transactions, geo, identity, network) tables for the Evidence tabs, built once per case and
+    reused across reruns; same TTL as _cached_alerts, which _alert comes from (not hashed).
+    Returned as Arrow tables, which st.dataframe serializes as-is instead of converting from pandas each rerun.
+    """
+    tables = get_evidence_tables(account_id, _alert)  # one row lookup for all four sections
+    return tuple(
+        pa.Table.from_pandas(tables[section], preserve_index=False)
+        for section in ("transactions", "geo", "identity", "network")
+    )
+
+
+# Demo fallbacks for Evidence tab metrics the alert lacks. "IPs linked" on the Network tab keeps its own
+# fallback (2), distinct from "Distinct IPs" here
+_ALERT_DEFAULTS = {
+    "total_deposits_90d": 125000,
+    "total_withdrawals_90d": 118200,
+    "num_deposits_90d": 12,
+    "deposit_withdraw_cycle_days_avg": 3.1,
+    "countries_accessed_count": 7,
+    "vpn_usage_pct": 82,
+    "ip_shared_count": 5,
+    "account_age_days": 152,
+    "device_shared_count": 8,
+}
+_EVIDENCE_TABS = ("💳 Transactions", "🌍 Access & Geo", "🪪 Identity", "🔗 Network", "📂 Similar Cases")
+
+
+@st.fragment
+def _render_evidence(alert: dict, agent_results: dict, selected_id: str) -> None:
+    """Evidence tabs, fed by the specialist agents; a fragment, so interactions here rerun only this block."""
+    st.markdown('<p class="section-label" style="margin-top:1.75rem; margin-bottom:1rem;">🔬 Evidence</p>', unsafe_allow_html=True)
+    # st.tabs runs every tab body on each rerun; the radio renders only the tab being viewed
+    active_tab = st.radio("Evidence", _EVIDENCE_TABS, horizontal=True, key="evidence_tab", label_visibility="collapsed")
+    tx_ag = agent_results.get("transaction") or {}
+    geo_ag = agent_results.get("geo") or {}
+    id_ag = agent_results.get("identity") or {}
+    net_ag = agent_results.get("network") or {}
+    tx_df, geo_df, id_df, net_df = _evidence_tables(selected_id, alert)
+    # Displayed value per metric: the alert's when truthy, else the demo fallback (same as `alert.get(k) or default`)
+    shown = {k: alert.get(k) or default for k, default in _ALERT_DEFAULTS.items()}
+    if active_tab == _EVIDENCE_TABS[0]:
+        if "_error" in tx_ag:
+            st.warning(f"Transaction agent unavailable: {agent_error_message(tx_ag.get('_error', 'Unknown error'))}")
+        else:
+            if tx_ag.get("anomaly_score") is not None:
+                st.metric("Behavior anomaly score", f"{float(tx_ag['anomaly_score']):.0%}")
+            if tx_ag.get("short_explanation"):
+                st.markdown(f"**Summary:** {escape_html(str(tx_ag['short_explanation']))}")
+            if tx_ag.get("detected_patterns"):
+                st.markdown("**Detected patterns:**")
+                for p in tx_ag["detected_patterns"] if isinstance(tx_ag["detected_patterns"], list) else [tx_ag["detected_patterns"]]:
+                    st.markdown(f"- {escape_html(str(p))}")
+        c1, c2 = st.columns(2)
+        with c1:
+            st.metric("Total deposits (90d)", f"£{shown['total_deposits_90d']:,.0f}")
+            st.metric("Total withdrawals (90d)", f"£{shown['total_withdrawals_90d']:,.0f}")
+        with c2:
+            st.metric("Deposit count", shown["num_deposits_90d"])
+            st.metric("Avg cycle (days)", f"{float(shown['deposit_withdraw_cycle_days_avg']):.1f}")
+        st.caption("Transaction summary (90d)")
+        st.dataframe(
+            tx_df,
+            use_container_width=True,
+            hide_index=True,
+        )
+    elif active_tab == _EVIDENCE_TABS[1]:
+        if "_error" in geo_ag:
+            st.warning(f"Geo/VPN agent unavailable: {agent_error_message(geo_ag.get('_error', 'Unknown error'))}")
+        else:
+            if geo_ag.get("geo_risk"):
+                st.metric("Geo/VPN risk", str(geo_ag["geo_risk"]))
+            if geo_ag.get("explanation"):
+                st.markdown(f"**Assessment:** {escape_html(str(geo_ag['explanation']))}")
+            if geo_ag.get("indicators"):
+                st.markdown("**Indicators:**")
+                for i in geo_ag["indicators"] if isinstance(geo_ag["indicators"], list) else [geo_ag["indicators"]]:
+                    st.markdown(f"- {escape_html(str(i))}")
+        c1, c2 = st.columns(2)
+        with c1:
+            st.metric("Countries (90d)", shown["countries_accessed_count"])
+            st.metric("VPN sessions %", f"{float(shown['vpn_usage_pct']):.0f}%")
+        with c2:
+            st.metric("Distinct IPs", shown["ip_shared_count"])
+            st.metric("Last login", "2025-01-16 09:00")
+        st.caption("Access by country")
+        st.dataframe(
+            geo_df,
+            use_container_width=True,
+            hide_index=True,
+        )
+    elif active_tab == _EVIDENCE_TABS[2]:
+        if "_error" in id_ag:
+            st.warning(f"Identity agent unavailable: {agent_error_message(id_ag.get('_error', 'Unknown error'))}")
+        else:
+            if id_ag.get("identity_risk"):
+                st.metric("Identity risk", str(id_ag["identity_risk"]))
+            if id_ag.get("explanation"):
+                st.markdown(f"**Assessment:** {escape_html(str(id_ag['explanation']))}")
+            if id_ag.get("indicators"):
+                st.markdown("**Indicators:**")
+                for i in id_ag["indicators"] if isinstance(id_ag["indicators"], list) else [id_ag["indicators"]]:
+                    st.markdown(f"- {escape_html(str(i))}")
+        c1, c2 = st.columns(2)
+        with c1:
+            kyc = alert.get("kyc_face_match_score")
+            st.metric("KYC face match", f"{float(kyc):.2f}" if kyc is not None else "0.62")
+            st.metric("Doc verified", "Yes")
+        with c2:
+            st.metric("Account age (days)", shown["account_age_days"])
+            inc = alert.get("declared_income_annual")
+            st.metric("Declared income", f"£{inc:,.0f}" if inc is not None else "£45,000")
+        st.caption("Identity checks")
+        st.dataframe(
+            id_df,
+            use_container_width=True,
+            hide_index=True,
+        )
+    elif active_tab == _EVIDENCE_TABS[3]:
+        if "_error" in net_ag:
+            st.warning(f"Network agent unavailable: {agent_error_message(net_ag.get('_error', 'Unknown error'))}")
+        else:
+            if net_ag.get("cluster_size") is not None:
+                st.metric("Cluster size", str(net_ag["cluster_size"]))
+            if net_ag.get("known_fraud_links") is not None:
+                st.metric("Known fraud links", str(net_ag["known_fraud_links"]))
+            if net_ag.get("explanation"):
+                st.markdown(f"**Assessment:** {escape_html(str(net_ag['explanation']))}")
+            if net_ag.get("shared_signals"):
+                st.markdown("**Shared signals:**")
+                for s in net_ag["shared_signals"] if isinstance(net_ag["shared_signals"], list) else [net_ag["shared_signals"]]:
+                    st.markdown(f"- {escape_html(str(s))}")
+        c1, c2 = st.columns(2)
+        with c1:
+            st.metric("Devices linked", 1)
+            st.metric("Accounts on same device", shown["device_shared_count"])
+        with c2:
+            st.metric("IPs linked", alert.get("ip_shared_count") or 2)
+            st.metric("Same device as fraud", "Yes")
+        st.caption("Device & IP summary")
+        st.dataframe(
+            net_df,
+            use_container_width=True,
+            hide_index=True,
+        )
+        network_graph = get_account_network(selected_id)
+        st.markdown("**Network graph** (pan/zoom)")
+        graph_nodes = network_graph.get("nodes") or []
+        if not graph_nodes:
+            net_html = None
+            st.caption("No network links detected")
+        elif len(graph_nodes) > _MAX_GRAPH_NODES:
+            # Skip pyvis entirely: list the nodes rather than ship a graph vis.js cannot lay out
+            net_html = None
+            st.warning(f"Graph omitted: {len(graph_nodes)} linked nodes (limit {_MAX_GRAPH_NODES}). Showing a table instead.")
+            st.dataframe(
+                [{"id": n.get("id", "?"), "type": n.get("type", ""), "label": n.get("label", "")} for n in graph_nodes],
+                use_container_width=True,
+                hide_index=True,
+            )
+        else:
+            net_html = _build_network_graph_html_from_graph(network_graph, height=500)
+            if not net_html:
+                st.caption("Install pyvis for interactive graph: pip install pyvis")
+        if net_html:
+            st.components.v1.html(net_html, height=500, scrolling=False)
+            if not network_graph.get("edges"):
+                st.caption("No network links detected")
+            elif network_graph.get("truncated"):
+                st.caption(network_graph.get("truncated_message", "Graph capped for readability."))
+    elif active_tab == _EVIDENCE_TABS[4]:
+        outcome_ag = agent_results.get("outcome_similarity") or {}
+        if "_error" in outcome_ag:
+            similar_n = get_similar_confirmed_count(alert["risk_level"], feature_vector=alert.get("feature_vector"))
+            st.warning(f"Outcome Similarity agent unavailable: {agent_error_message(outcome_ag.get('_error', 'Unknown error'))}")
+            st.markdown(f"**Similar confirmed cases (system):** {similar_n} previously confirmed fraud case{'s' if similar_n != 1 else ''} match this pattern.")
+        else:
+            if outcome_ag.get("fraud_likelihood") is not None:
+                try:
+                    st.metric("Fraud likelihood (outcome-based)", f"{float(outcome_ag['fraud_likelihood']):.0%}")
+                except (TypeError, ValueError):
+                    st.metric("Fraud likelihood (outcome-based)", str(outcome_ag["fraud_likelihood"]))
+            if outcome_ag.get("similar_confirmed_cases_count") is not None:
+                n = outcome_ag["similar_confirmed_cases_count"]
+                st.metric("Similar confirmed cases", n)
+            if outcome_ag.get("explanation"):
+                st.markdown(f"**Assessment:** {escape_html(str(outcome_ag['explanation']))}")
+        st.caption("Similar confirmed cases inform the outcome-informed queue sort.")
+
+
 # -----------------------------------------------------------------------------
 # Main area: case header + case details (live for selected alert)
 # -----------------------------------------------------------------------------
@@ -585,11 +795,13 @@ if selected_id:
         status_color = "#e6edf3"
         status_label = status
     st.markdown(
-        f'<div class="fraud-card" style="display:flex; align-items:center; flex-wrap:wrap; gap:2rem;">'
-        f'<div><p class="fraud-card-title">Account</p><p style="margin:0; font-size:1.1rem; font-weight:600; color:#e6edf3;">{selected_id}</p></div>'
-        f'<div><p class="fraud-card-title">Status</p><p style="margin:0; font-size:1rem; font-weight:600; color:{status_color};">{status_label}</p></div>'
-        f'<div><p class="fraud-card-title">Risk score</p><p class="fraud-metric-value" style="color:{risk_color}; margin:0;">{risk_pct:.0f}%</p></div>'
-        f'</div>',
+        _CASE_HEADER_TMPL.format_map({
+            "account_id": selected_id,
+            "status_color": status_color,
+            "status_label": status_label,
+            "risk_color": risk_color,
+            "risk_pct": risk_pct,
+        }),
         unsafe_allow_html=True,
     )
     st.markdown('<p class="fraud-card-title" style="margin-bottom:0.5rem;">Actions</p>', unsafe_allow_html=True)
@@ -598,6 +810,7 @@ if selected_id:
         pattern = run_knowledge_capture(alert, decision, reason)
         if pattern and "_error" not in pattern:
             add_knowledge_pattern(selected_id, pattern)
+        _on_feedback_written()
 
     # Row 1: three equal columns
     act_a, act_b, act_c = st.columns(3)
@@ -637,7 +850,7 @@ if selected_id:
     with act_f:
         if st.button("Run investigation agents", key="btn_run_agents", help="Run Transaction, Identity, Geo, Network, Outcome Similarity and Orchestrator agents for this case"):
             with st.spinner("Running investigation agents…"):
-                st.session_state.agent_cache[selected_id] = run_pipeline(alert, "alert_creation")
+                st.session_state.agent_cache[selected_id] = _run_pipeline_cached(alert)
             st.rerun()
 
     if not agent_results:
@@ -655,6 +868,7 @@ if selected_id:
                 anomaly_score=alert.get("anomaly_score"),
                 feature_vector=alert.get("feature_vector"),
             )
+            _on_feedback_written()
             st.session_state.case_status[selected_id] = "Under Review"
             st.rerun()
     # Dismiss as false positive: required reason (audit trail) — regulator-safe
@@ -680,23 +894,10 @@ if selected_id:
     # Auto-resolve suggestion (conservative: low risk + historical FPs)
     prob, anom = alert["fraud_probability"], alert.get("anomaly_score") or 0
     low_risk = prob < 0.15 and anom < 0.3
-    if low_risk and has_false_positive_history() and status not in ("False Positive", "Marked Legit", "Confirmed Fraud"):
+    if low_risk and _cached_fp_history() and status not in ("False Positive", "Marked Legit", "Confirmed Fraud"):
         st.info("**Consider dismissing as false positive?** Pattern consistent with historical legitimate behavior. Use *Dismiss as false positive* to record reason for audit.")
     st.markdown("---")
 
-    def _escape(s: str) -> str:
-        return (s or "").replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
-
-    def _agent_error_message(err: str) -> str:
-        """User-facing message for agent errors; rate-limit and quota get a friendly line."""
-        if not err:
-            return "Unknown error"
-        err_lower = err.lower()
-        if "daily" in err_lower or "per day" in err_lower or "perday" in err_lower or "free_tier" in err_lower:
-            return "Daily API quota reached (free tier). Try again tomorrow or check your plan: https://ai.google.dev/gemini-api/docs/rate-limits"
-        if any(x in err_lower or x in err for x in ("rate limit", "quota", "429", "resource exhausted")):
-            return "Rate limit reached. Please try again in a minute."
-        return err
 
     # ---------- Case metrics (compact row) ----------
     st.markdown(f'<p class="section-label">Case: {selected_id}</p>', unsafe_allow_html=True)
@@ -708,7 +909,7 @@ if selected_id:
     with col3:
         st.metric("Risk level", alert["risk_level"])
     st.markdown(
-        f'<p style="font-size:0.9rem; color:#8b949e; margin-top:-0.5rem; margin-bottom:0.5rem;">{_escape(alert["one_line_explanation"] or "")}</p>',
+        f'<p style="font-size:0.9rem; color:#8b949e; margin-top:-0.5rem; margin-bottom:0.5rem;">{escape_html(alert["one_line_explanation"] or "")}</p>',
         unsafe_allow_html=True,
     )
     outcome_priority_expl = (alert.get("outcome_priority_explanation") or "").strip()
@@ -733,7 +934,7 @@ if selected_id:
         likelihood_phrase = "Lower likelihood of real fraud"
     similar_phrase = f" Behavioral pattern similar to {similar_n} previously confirmed fraud case{'s' if similar_n != 1 else ''}." if similar_n else " Similar to confirmed fraud patterns."
     if similar_expl:
-        similar_phrase = f" {_escape(similar_expl)}"
+        similar_phrase = f" {escape_html(similar_expl)}"
     st.markdown(
         f'<p style="font-size:0.9rem; color:#c9d1d9; margin-bottom:1rem;">'
         f'<strong>{likelihood_phrase} ({pct:.0f}%).</strong> Based on <strong>{n_factors}</strong> independent risk signal{"s" if n_factors != 1 else ""}.'
@@ -747,209 +948,57 @@ if selected_id:
         bullets = orch.get("key_drivers") or []
         if orch.get("investigation_summary"):
             bullets = [orch["investigation_summary"]] + list(bullets)
-        bullets_html = "<br>".join("• " + _escape(str(b)) for b in bullets) if bullets else _escape(orch.get("investigation_summary", ""))
+        drivers_html = bullets_html(tuple(map(str, bullets))) if bullets else escape_html(orch.get("investigation_summary", ""))
         conf_val = orch.get("confidence")
         if conf_val is not None:
             try:
-                c = float(conf_val)
-                if c >= 0.6:
-                    confidence_label, confidence_note, conf_color = "High confidence", "The model is fairly confident this case deserves review.", "#c62828"
-                elif c >= 0.3:
-                    confidence_label, confidence_note, conf_color = "Medium confidence", "The model sees notable risk; human review is recommended.", "#e65100"
-                else:
-                    confidence_label, confidence_note, conf_color = "Low confidence", "The model flagged this for completeness; may be normal variation.", "#2e7d32"
+                confidence_label, confidence_note, conf_color = _confidence(float(conf_val))
             except (TypeError, ValueError):
                 confidence_label, confidence_note, conf_color = "Medium confidence", orch.get("investigation_summary") or "Human review recommended.", "#e65100"
         else:
             confidence_label, confidence_note, conf_color = "Medium confidence", orch.get("investigation_summary") or "Human review recommended.", "#e65100"
         priority = orch.get("priority")
-        priority_line = f'<p style="margin-top:0.5rem; font-size:0.9rem; color:#8b949e;">Priority: {_escape(str(priority))} (1 = urgent, 5 = low)</p>' if priority is not None else ""
+        priority_line = _PRIORITY_LINE_TMPL.format_map({"priority": escape_html(str(priority))}) if priority is not None else ""
         st.markdown(
-            f'<div class="fraud-card">'
-            f'<p style="font-size:1.15rem; font-weight:600; color:#e6edf3; margin-bottom:0.75rem;">Why this account was flagged</p>'
-            f'<div style="line-height:1.8; font-size:1rem; color:#c9d1d9;">{bullets_html}</div>'
-            f'<p style="margin-top:1rem; margin-bottom:0.25rem; font-weight:600; color:{conf_color};">{confidence_label}</p>'
-            f'<p style="margin:0; font-size:0.9rem; color:#8b949e;">{confidence_note}</p>'
-            f'{priority_line}'
-            f'</div>',
+            _FRAUD_CARD_TMPL.format_map({
+                "bullets_html": drivers_html,
+                "conf_color": conf_color,
+                "confidence_label": confidence_label,
+                "confidence_note": confidence_note,
+                "priority_line": priority_line,
+            }),
             unsafe_allow_html=True,
         )
     else:
         risk_factors = alert.get("risk_factors") or [alert.get("one_line_explanation", "Activity was flagged for review.")]
-        bullets_html = "<br>".join("• " + _escape(str(f)) for f in risk_factors)
+        drivers_html = bullets_html(tuple(map(str, risk_factors)))
         prob = alert["fraud_probability"]
-        if prob >= 0.6:
-            confidence_label, confidence_note, conf_color = "High confidence", "The model is fairly confident this case deserves review.", "#c62828"
-        elif prob >= 0.3:
-            confidence_label, confidence_note, conf_color = "Medium confidence", "The model sees notable risk; human review is recommended.", "#e65100"
-        else:
-            confidence_label, confidence_note, conf_color = "Low confidence", "The model flagged this for completeness; may be normal variation.", "#2e7d32"
+        confidence_label, confidence_note, conf_color = _confidence(prob)
         st.markdown(
-            f'<div class="fraud-card">'
-            f'<p style="font-size:1.15rem; font-weight:600; color:#e6edf3; margin-bottom:0.75rem;">Why this account was flagged</p>'
-            f'<div style="line-height:1.8; font-size:1rem; color:#c9d1d9;">{bullets_html}</div>'
-            f'<p style="margin-top:1rem; margin-bottom:0.25rem; font-weight:600; color:{conf_color};">{confidence_label}</p>'
-            f'<p style="margin:0; font-size:0.9rem; color:#8b949e;">{confidence_note}</p>'
-            f'</div>',
+            _FRAUD_CARD_TMPL.format_map({
+                "bullets_html": drivers_html,
+                "conf_color": conf_color,
+                "confidence_label": confidence_label,
+                "confidence_note": confidence_note,
+                "priority_line": "",
+            }),
             unsafe_allow_html=True,
         )
 
     # ---------- 30s Copilot Summary (one-glance summary below risk card) ----------
     if orch and "_error" not in orch and orch.get("investigation_summary"):
-        copilot_text = (orch.get("investigation_summary") or "").strip()
-        if len(copilot_text) > 200:
-            copilot_text = copilot_text[:200].rsplit(" ", 1)[0] + "…"
         st.markdown(
             f'<p style="font-size:0.85rem; color:#8b949e; margin:0.5rem 0 1rem 0; line-height:1.5;">'
-            f'<strong style="color:#c9d1d9;">30s summary:</strong> {_escape(copilot_text)}</p>',
+            f'<strong style="color:#c9d1d9;">30s summary:</strong> {summary_html(str(orch["investigation_summary"]))}</p>',
             unsafe_allow_html=True,
         )
     else:
         if st.button("Run investigation to see summary", key="btn_run_agents_30s", help="Run investigation agents to generate the 30s summary"):
             with st.spinner("Running investigation agents…"):
-                st.session_state.agent_cache[selected_id] = run_pipeline(alert, "alert_creation")
+                st.session_state.agent_cache[selected_id] = _run_pipeline_cached(alert)
             st.rerun()
 
-    # ---------- Evidence (tabbed): fed by specialist agents ----------
-    st.markdown('<p class="section-label" style="margin-top:1.75rem; margin-bottom:1rem;">🔬 Evidence</p>', unsafe_allow_html=True)
-    tab_tx, tab_geo, tab_id, tab_net, tab_similar = st.tabs(["💳 Transactions", "🌍 Access & Geo", "🪪 Identity", "🔗 Network", "📂 Similar Cases"])
-    tx_ag = agent_results.get("transaction") or {}
-    geo_ag = agent_results.get("geo") or {}
-    id_ag = agent_results.get("identity") or {}
-    net_ag = agent_results.get("network") or {}
-    with tab_tx:
-        if "_error" in tx_ag:
-            st.warning(f"Transaction agent unavailable: {_agent_error_message(tx_ag.get('_error', 'Unknown error'))}")
-        else:
-            if tx_ag.get("anomaly_score") is not None:
-                st.metric("Behavior anomaly score", f"{float(tx_ag['anomaly_score']):.0%}")
-            if tx_ag.get("short_explanation"):
-                st.markdown(f"**Summary:** {_escape(str(tx_ag['short_explanation']))}")
-            if tx_ag.get("detected_patterns"):
-                st.markdown("**Detected patterns:**")
-                for p in tx_ag["detected_patterns"] if isinstance(tx_ag["detected_patterns"], list) else [tx_ag["detected_patterns"]]:
-                    st.markdown(f"- {_escape(str(p))}")
-        c1, c2 = st.columns(2)
-        with c1:
-            st.metric("Total deposits (90d)", f"£{alert.get('total_deposits_90d') or 125000:,.0f}")
-            st.metric("Total withdrawals (90d)", f"£{alert.get('total_withdrawals_90d') or 118200:,.0f}")
-        with c2:
-            st.metric("Deposit count", alert.get("num_deposits_90d") or 12)
-            st.metric("Avg cycle (days)", f"{float(alert.get('deposit_withdraw_cycle_days_avg') or 3.1):.1f}")
-        st.caption("Transaction summary (90d)")
-        st.dataframe(
-            get_transactions(selected_id, alert),
-            use_container_width=True,
-            hide_index=True,
-        )
-    with tab_geo:
-        if "_error" in geo_ag:
-            st.warning(f"Geo/VPN agent unavailable: {_agent_error_message(geo_ag.get('_error', 'Unknown error'))}")
-        else:
-            if geo_ag.get("geo_risk"):
-                st.metric("Geo/VPN risk", str(geo_ag["geo_risk"]))
-            if geo_ag.get("explanation"):
-                st.markdown(f"**Assessment:** {_escape(str(geo_ag['explanation']))}")
-            if geo_ag.get("indicators"):
-                st.markdown("**Indicators:**")
-                for i in geo_ag["indicators"] if isinstance(geo_ag["indicators"], list) else [geo_ag["indicators"]]:
-                    st.markdown(f"- {_escape(str(i))}")
-        c1, c2 = st.columns(2)
-        with c1:
-            st.metric("Countries (90d)", alert.get("countries_accessed_count") or 7)
-            st.metric("VPN sessions %", f"{float(alert.get('vpn_usage_pct') or 82):.0f}%")
-        with c2:
-            st.metric("Distinct IPs", alert.get("ip_shared_count") or 5)
-            st.metric("Last login", "2025-01-16 09:00")
-        st.caption("Access by country")
-        st.dataframe(
-            get_geo_activity(selected_id, alert),
-            use_container_width=True,
-            hide_index=True,
-        )
-    with tab_id:
-        if "_error" in id_ag:
-            st.warning(f"Identity agent unavailable: {_agent_error_message(id_ag.get('_error', 'Unknown error'))}")
-        else:
-            if id_ag.get("identity_risk"):
-                st.metric("Identity risk", str(id_ag["identity_risk"]))
-            if id_ag.get("explanation"):
-                st.markdown(f"**Assessment:** {_escape(str(id_ag['explanation']))}")
-            if id_ag.get("indicators"):
-                st.markdown("**Indicators:**")
-                for i in id_ag["indicators"] if isinstance(id_ag["indicators"], list) else [id_ag["indicators"]]:
-                    st.markdown(f"- {_escape(str(i))}")
-        c1, c2 = st.columns(2)
-        with c1:
-            kyc = alert.get("kyc_face_match_score")
-            st.metric("KYC face match", f"{float(kyc):.2f}" if kyc is not None else "0.62")
-            st.metric("Doc verified", "Yes")
-        with c2:
-            st.metric("Account age (days)", alert.get("account_age_days") or 152)
-            inc = alert.get("declared_income_annual")
-            st.metric("Declared income", f"£{inc:,.0f}" if inc is not None else "£45,000")
-        st.caption("Identity checks")
-        st.dataframe(
-            get_identity_signals(selected_id, alert),
-            use_container_width=True,
-            hide_index=True,
-        )
-    with tab_net:
-        if "_error" in net_ag:
-            st.warning(f"Network agent unavailable: {_agent_error_message(net_ag.get('_error', 'Unknown error'))}")
-        else:
-            if net_ag.get("cluster_size") is not None:
-                st.metric("Cluster size", str(net_ag["cluster_size"]))
-            if net_ag.get("known_fraud_links") is not None:
-                st.metric("Known fraud links", str(net_ag["known_fraud_links"]))
-            if net_ag.get("explanation"):
-                st.markdown(f"**Assessment:** {_escape(str(net_ag['explanation']))}")
-            if net_ag.get("shared_signals"):
-                st.markdown("**Shared signals:**")
-                for s in net_ag["shared_signals"] if isinstance(net_ag["shared_signals"], list) else [net_ag["shared_signals"]]:
-                    st.markdown(f"- {_escape(str(s))}")
-        c1, c2 = st.columns(2)
-        with c1:
-            st.metric("Devices linked", 1)
-            st.metric("Accounts on same device", alert.get("device_shared_count") or 8)
-        with c2:
-            st.metric("IPs linked", alert.get("ip_shared_count") or 2)
-            st.metric("Same device as fraud", "Yes")
-        st.caption("Device & IP summary")
-        st.dataframe(
-            get_network_signals(selected_id, alert),
-            use_container_width=True,
-            hide_index=True,
-        )
-        network_graph = get_account_network(selected_id)
-        st.markdown("**Network graph** (pan/zoom)")
-        net_html = _build_network_graph_html_from_graph(network_graph, height=500)
-        if net_html:
-            st.components.v1.html(net_html, height=500, scrolling=False)
-            if not network_graph.get("edges"):
-                st.caption("No network links detected")
-            elif network_graph.get("truncated"):
-                st.caption(network_graph.get("truncated_message", "Graph capped for readability."))
-        else:
-            st.caption("Install pyvis for interactive graph: pip install pyvis")
-    with tab_similar:
-        outcome_ag = agent_results.get("outcome_similarity") or {}
-        if "_error" in outcome_ag:
-            similar_n = get_similar_confirmed_count(alert["risk_level"], feature_vector=alert.get("feature_vector"))
-            st.warning(f"Outcome Similarity agent unavailable: {_agent_error_message(outcome_ag.get('_error', 'Unknown error'))}")
-            st.markdown(f"**Similar confirmed cases (system):** {similar_n} previously confirmed fraud case{'s' if similar_n != 1 else ''} match this pattern.")
-        else:
-            if outcome_ag.get("fraud_likelihood") is not None:
-                try:
-                    st.metric("Fraud likelihood (outcome-based)", f"{float(outcome_ag['fraud_likelihood']):.0%}")
-                except (TypeError, ValueError):
-                    st.metric("Fraud likelihood (outcome-based)", str(outcome_ag["fraud_likelihood"]))
-            if outcome_ag.get("similar_confirmed_cases_count") is not None:
-                n = outcome_ag["similar_confirmed_cases_count"]
-                st.metric("Similar confirmed cases", n)
-            if outcome_ag.get("explanation"):
-                st.markdown(f"**Assessment:** {_escape(str(outcome_ag['explanation']))}")
-        st.caption("Similar confirmed cases inform the outcome-informed queue sort.")
+    _render_evidence(alert, agent_results, selected_id)
     st.divider()
 
 else:
@@ -961,21 +1010,20 @@ else:
 st.markdown("---")
 
 # ---------- Timeline (Mermaid diagram) ----------
-def _mermaid_timeline(events: list[dict]) -> str:
-    """Build Mermaid flowchart TB from chronological events; highlight suspicious nodes."""
-    if not events:
+def _mermaid_timeline(sorted_events: list[dict]) -> str:
+    """Build Mermaid flowchart TB from events already in timestamp order; highlight suspicious nodes."""
+    if not sorted_events:
         return "flowchart TB\n  A[No events]"
-    # Sort by timestamp
-    sorted_events = sorted(events, key=lambda e: e.get("timestamp", ""))
     lines = ["flowchart TB"]
     suspicious_ids = []
     for i, ev in enumerate(sorted_events):
         node_id = f"E{i}"
         ts = ev.get("timestamp", "")[:16]
-        etype = (ev.get("event_type") or "Event").replace('"', "'")
-        details = (ev.get("details") or "").replace('"', "'")[:20]
+        etype = ev.get("event_type") or "Event"
+        details = (ev.get("details") or "")[:20]
         label = f"{ts} {etype}" + (f" {details}" if details else "")
-        # Mermaid node: E0["label"] — escape so label does not break diagram or HTML
+        # Mermaid node: E0["label"] — escape so label does not break diagram or HTML. Chained str.replace
+        # beats str.translate here (labels carry non-ASCII like £, which sends translate down its slow path)
         safe_label = label.replace("]", " ").replace('"', "'").replace("<", " ").replace(">", " ").replace("{", " ").replace("}", " ")
         lines.append(f'  {node_id}["{safe_label}"]')
         if ev.get("suspicious"):
@@ -988,87 +1036,159 @@ def _mermaid_timeline(events: list[dict]) -> str:
     return "\n".join(lines)
 
 
-def _mermaid_html(mermaid_code: str) -> str:
-    """Return HTML that loads Mermaid.js and renders the diagram (UMD bundle for iframe)."""
-    return (
-        '<div class="mermaid" style="min-height:200px;">'
-        + mermaid_code
-        + """</div>
-<script src="https://cdn.jsdelivr.net/npm/mermaid@9/dist/mermaid.min.js"></script>
+_MERMAID_PREFIX = '<div class="mermaid" style="min-height:200px;">'
+_MERMAID_SUFFIX = """</div>
+<script src="https://cdn.jsdelivr.net/npm/mermaid@10/dist/mermaid.min.js"></script>
 <script>
   mermaid.initialize({ startOnLoad: true, theme: 'neutral' });
 </script>"""
-    )
+
+
+def _mermaid_html(mermaid_code: str) -> str:
+    """Return HTML that loads Mermaid.js and renders the diagram (UMD bundle for iframe)."""
+    return f"{_MERMAID_PREFIX}{mermaid_code}{_MERMAID_SUFFIX}"
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _timeline_mermaid_html(sorted_events: list[dict]) -> str:
+    """Rule-based timeline diagram page for time-ordered events; cached on their content, which is fixed per case."""
+    return _mermaid_html(_mermaid_timeline(sorted_events))
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _spec_mermaid_html(spec: dict) -> str:
+    """Visualization-agent timeline diagram page for spec; cached on its content."""
+    return _mermaid_html(spec_to_mermaid(spec))
 
 
 st.markdown('<p class="section-label">📅 Timeline</p>', unsafe_allow_html=True)
-with st.expander("📅 Chronological events", expanded=True):
-    if selected_id:
-        alert = alert_by_id.get(selected_id)
-        events = (alert or {}).get("timeline_events") or []
-        if events:
-            st.session_state.setdefault("timeline_spec_cache", {})
-            spec = st.session_state.timeline_spec_cache.get(selected_id)
-            if st.button("Build timeline flow", key="btn_build_timeline", help="Run Visualization agent to build AI-generated flowchart from events"):
-                with st.spinner("Building timeline flow…"):
-                    st.session_state.timeline_spec_cache[selected_id] = run_visualization_agent(events)
-                st.rerun()
-            if spec and "_error" not in spec and spec.get("timeline") and spec.get("edges") is not None:
-                mermaid_code = spec_to_mermaid(spec)
-                st.markdown("**Chronological events** (AI-generated flow; risk = yellow, high risk = red)")
-                st.components.v1.html(_mermaid_html(mermaid_code), height=400)
+
+
+@st.fragment
+def _render_timeline(selected_id: str | None, alert: dict | None) -> None:
+    """Timeline expander; a fragment, so "Build timeline flow" reruns only this block."""
+    with st.expander("📅 Chronological events", expanded=True):
+        if selected_id:
+            events = (alert or {}).get("timeline_events") or []
+            if events:
+                # One sort feeds both the diagram and the text list
+                sorted_events = sorted(events, key=lambda e: e.get("timestamp", ""))
+                spec_cache = st.session_state.setdefault("timeline_spec_cache", OrderedDict())
+                spec = spec_cache.get(selected_id)
+                if spec is not None:
+                    spec_cache.move_to_end(selected_id)
+                if st.button("Build timeline flow", key="btn_build_timeline", help="Run Visualization agent to build AI-generated flowchart from events"):
+                    with st.spinner("Building timeline flow…"):
+                        _lru_put(spec_cache, selected_id, run_visualization_agent(events))
+                    st.rerun(scope="fragment")
+                if spec and "_error" not in spec and spec.get("timeline") and spec.get("edges") is not None:
+                    st.markdown("**Chronological events** (AI-generated flow; risk = yellow, high risk = red)")
+                    st.components.v1.html(_spec_mermaid_html(spec), height=400)
+                else:
+                    st.markdown("**Chronological events** (rule-based; suspicious events highlighted in red border)")
+                    st.components.v1.html(_timeline_mermaid_html(sorted_events), height=400)
+                with st.expander("📜 Event list (text)", expanded=False):
+                    for ev in sorted_events:
+                        susp = " ⚠️ Suspicious" if ev.get("suspicious") else ""
+                        st.markdown(f"- **{ev.get('timestamp', '')}** — {ev.get('event_type', '')} {ev.get('details', '')}{susp}")
             else:
-                mermaid_code = _mermaid_timeline(events)
-                st.markdown("**Chronological events** (rule-based; suspicious events highlighted in red border)")
-                st.components.v1.html(_mermaid_html(mermaid_code), height=400)
-            with st.expander("📜 Event list (text)", expanded=False):
-                for ev in sorted(events, key=lambda e: e.get("timestamp", "")):
-                    susp = " ⚠️ Suspicious" if ev.get("suspicious") else ""
-                    st.markdown(f"- **{ev.get('timestamp', '')}** — {ev.get('event_type', '')} {ev.get('details', '')}{susp}")
+                st.write("No timeline events for this case.")
         else:
-            st.write("No timeline events for this case.")
-    else:
-        st.write("Select an alert to view the timeline.")
+            st.write("Select an alert to view the timeline.")
 
-# ---------- Recommended Next Steps ----------
-def _escape_html(s: str) -> str:
-    return (s or "").replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
 
+_render_timeline(selected_id, alert_by_id.get(selected_id) if selected_id else None)
+
+# ---------- Recommended Next Steps ----------
 st.markdown("---")
 st.markdown(
     '<p class="section-label">💡 Recommended next steps</p>'
     '<p style="font-size:0.9rem; color:#8b949e; margin-bottom:0.75rem;">Suggestions to support your investigation—you decide what to do next.</p>',
     unsafe_allow_html=True,
 )
-if selected_id:
-    alert = alert_by_id.get(selected_id)
-    try:
-        from backend.explainability.next_step_advisor import recommend_next_steps
-        indicators = alert.get("risk_factors") or [alert.get("one_line_explanation", "")]
-        out = recommend_next_steps(indicators, use_llm=True)
-        steps = out.get("next_steps", [])
-        rationale = out.get("rationale", "")
-    except Exception:
-        steps = ["Unable to load recommendations. Set OPENAI_API_KEY and retry."]
-        rationale = ""
-else:
-    steps = ["Select a case from the sidebar to see steps tailored to that alert."]
-    rationale = ""
-st.markdown(
-    '<div class="fraud-card"><ol style="margin:0; padding-left:1.25rem; color:#c9d1d9; line-height:1.8;">'
-    + "".join(f'<li style="margin-bottom:0.35rem;">{_escape_html(s)}</li>' for s in steps)
-    + "</ol>"
-    + (f'<p style="margin-top:0.75rem; margin-bottom:0; font-size:0.85rem; color:#8b949e;">{_escape_html(rationale)}</p>' if rationale else '')
-    + "</div>",
-    unsafe_allow_html=True,
-)
+
+
+def _llm_config_key() -> str:
+    """Digest of the LLM credentials/endpoint in the environment: adding or changing a key invalidates cached LLM output."""
+    env = "\0".join(os.environ.get(k, "") for k in ("GOOGLE_API_KEY", "OPENAI_API_KEY", "OPENAI_BASE_URL"))
+    return hashlib.blake2b(env.encode(), digest_size=8).hexdigest()
+
+
+class _LLMFailed(Exception):
+    """Raised by the cached LLM wrappers so st.cache_data stores nothing; result is the helper's error output."""
+
+    def __init__(self, result):
+        super().__init__("LLM call failed")
+        self.result = result
+
+
+@st.cache_data(ttl=1800, show_spinner=False)
+def _cached_next_steps(indicators: tuple[str, ...], llm_key: str) -> dict:
+    """
+    recommend_next_steps(indicators, use_llm=True), reused for 30 min per indicator set and LLM config.
+    LLM errors raise _LLMFailed instead, so the next rerun asks again.
+    """
+    out = recommend_next_steps(list(indicators), use_llm=True)
+    if out.get("error"):
+        raise _LLMFailed(out)
+    return out
+
+
+@st.cache_data(ttl=1800, show_spinner=False)
+def _cached_regulatory_report(case_context: str, llm_key: str) -> str:
+    """
+    generate_regulatory_report(case_context, use_llm=True), reused for 30 min per case context and LLM config.
+    LLM errors raise _LLMFailed instead, so the next click asks again.
+    """
+    report_md = generate_regulatory_report(case_context, use_llm=True)
+    if is_llm_required_report(report_md):
+        raise _LLMFailed(report_md)
+    return report_md
+
+
+def _steps_card_html(steps: list, rationale: str) -> str:
+    return _STEPS_CARD_TMPL.format_map({
+        "items": "".join(map(_STEP_LI_TMPL.format, map(escape_html, steps))),
+        "rationale_line": _RATIONALE_LINE_TMPL.format(escape_html(rationale)) if rationale else "",
+    })
+
+
+@st.fragment
+def _render_next_steps(alert: dict | None) -> None:
+    """
+    Next-steps card for the selected alert (placeholder step when none is selected); rendered as a fragment.
+    The finished card HTML is kept per (account, indicators, LLM config) in a session LRU, so reruns for a
+    case skip the recommendation lookup and the markup build. Failed lookups (an exception or an LLM error)
+    are shown but not kept, so the next rerun asks again.
+    """
+    if alert is None:
+        card = _steps_card_html(["Select a case from the sidebar to see steps tailored to that alert."], "")
+    else:
+        indicators = tuple(alert.get("risk_factors") or [alert.get("one_line_explanation", "")])
+        llm_key = _llm_config_key()
+        key = (alert.get("account_id"), indicators, llm_key)
+        html_cache = st.session_state.setdefault("next_steps_html", OrderedDict())
+        card = html_cache.get(key)
+        if card is not None:
+            html_cache.move_to_end(key)
+        else:
+            try:
+                out = _cached_next_steps(indicators, llm_key)
+            except _LLMFailed as e:
+                card = _steps_card_html(e.result.get("next_steps", []), e.result.get("rationale", ""))
+            except Exception:
+                card = _steps_card_html(["Unable to load recommendations. Set OPENAI_API_KEY and retry."], "")
+            else:
+                card = _steps_card_html(out.get("next_steps", []), out.get("rationale", ""))
+                _lru_put(html_cache, key, card)
+    st.markdown(card, unsafe_allow_html=True)
+
+_render_next_steps(alert_by_id.get(selected_id) if selected_id else None)
 st.markdown("---")
 
 # ---------- Investigation Report (generate on demand, display in expander) ----------
-if "investigation_report" not in st.session_state:
-    st.session_state.investigation_report = None
-if "investigation_report_account" not in st.session_state:
-    st.session_state.investigation_report_account = None
+# account_id -> report markdown, most recently used last
+investigation_reports = st.session_state.setdefault("investigation_reports", OrderedDict())
 
 def _build_case_context(account_id: str, alert: dict, status: str) -> str:
     """Build a single text block of case data for the regulatory report generator."""
@@ -1082,18 +1202,15 @@ def _build_case_context(account_id: str, alert: dict, status: str) -> str:
         "",
         "Risk factors:",
     ]
-    for f in alert.get("risk_factors") or []:
-        lines.append(f"  - {f}")
+    lines.extend(f"  - {f}" for f in alert.get("risk_factors") or ())
     events = alert.get("timeline_events") or []
     if events:
-        lines.append("")
-        lines.append("Timeline events:")
-        for e in events:
-            ts = e.get("timestamp", "")
-            typ = e.get("event_type", "")
-            details = e.get("details", "")
-            susp = " [suspicious]" if e.get("suspicious") else ""
-            lines.append(f"  - {ts} | {typ} | {details}{susp}")
+        lines.extend(("", "Timeline events:"))
+        lines.extend(
+            f"  - {e.get('timestamp', '')} | {e.get('event_type', '')} | {e.get('details', '')}"
+            + (" [suspicious]" if e.get("suspicious") else "")
+            for e in events
+        )
     lines.append("")
     lines.append("Evidence types available on dashboard: transaction history (last 5), access by country, VPN %, KYC/identity checks, device and IP network graph. Use only what is stated above or explicitly marked as available.")
     return "\n".join(lines)
@@ -1101,10 +1218,9 @@ def _build_case_context(account_id: str, alert: dict, status: str) -> str:
 report_expanded = False
 if selected_id:
     alert_for_report = alert_by_id.get(selected_id)
-    has_report = (
-        st.session_state.investigation_report is not None
-        and st.session_state.investigation_report_account == selected_id
-    )
+    has_report = selected_id in investigation_reports
+    if has_report:
+        investigation_reports.move_to_end(selected_id)
     st.markdown('<p class="section-label">📋 Investigation report</p>', unsafe_allow_html=True)
     if st.button("📋 Generate Investigation Report", key="btn_generate_report"):
         case_context = _build_case_context(
@@ -1112,10 +1228,11 @@ if selected_id:
         )
         with st.spinner("Generating report..."):
             try:
-                from backend.explainability.report_writer import generate_regulatory_report
-                report_md = generate_regulatory_report(case_context, use_llm=True)
-                st.session_state.investigation_report = report_md
-                st.session_state.investigation_report_account = selected_id
+                try:
+                    report_md = _cached_regulatory_report(case_context, _llm_config_key())
+                except _LLMFailed as e:
+                    report_md = e.result  # shown for this case; the data cache keeps nothing
+                _lru_put(investigation_reports, selected_id, report_md)
                 report_expanded = True
             except Exception as e:
                 st.error(f"Report generation failed: {e}")
@@ -1128,17 +1245,18 @@ else:
 with st.expander("📋 Report", expanded=report_expanded):
     if not selected_id:
         st.markdown('<p style="color:#8b949e;">Select a case from the sidebar to generate an investigation report.</p>', unsafe_allow_html=True)
-    elif st.session_state.investigation_report and st.session_state.investigation_report_account == selected_id:
-        st.markdown(st.session_state.investigation_report)
+    elif investigation_reports.get(selected_id):
+        st.markdown(investigation_reports[selected_id])
         if st.button("Regenerate report", key="btn_regenerate_report"):
             case_context = _build_case_context(
                 selected_id, alert_by_id[selected_id], _get_case_status(selected_id)
             )
             with st.spinner("Regenerating report..."):
                 try:
-                    from backend.explainability.report_writer import generate_regulatory_report
-                    st.session_state.investigation_report = generate_regulatory_report(case_context, use_llm=True)
-                    st.session_state.investigation_report_account = selected_id
+                    # Regenerate asks for a fresh draft: bypass the cache and drop the stale entry
+                    report_md = generate_regulatory_report(case_context, use_llm=True)
+                    _cached_regulatory_report.clear(case_context, _llm_config_key())
+                    _lru_put(investigation_reports, selected_id, report_md)
                 except Exception as e:
                     st.error(f"Report generation failed: {e}")
             st.rerun()
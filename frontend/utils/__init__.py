@@ -1 +1 @@
-# Frontend utilities: graph, mermaid.
+# Frontend utilities: graph, mermaid, alert queue records, HTML escaping, agent error text.
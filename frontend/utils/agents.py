@@ -0,0 +1,15 @@
+"""User-facing text for specialist-agent results shown in the dashboard."""
+from functools import lru_cache
+
+
+@lru_cache(maxsize=128)
+def agent_error_message(err: str) -> str:
+    """User-facing message for agent errors; rate-limit and quota get a friendly line."""
+    if not err:
+        return "Unknown error"
+    err_lower = err.lower()
+    if "daily" in err_lower or "per day" in err_lower or "perday" in err_lower or "free_tier" in err_lower:
+        return "Daily API quota reached (free tier). Try again tomorrow or check your plan: https://ai.google.dev/gemini-api/docs/rate-limits"
+    if any(x in err_lower or x in err for x in ("rate limit", "quota", "429", "resource exhausted")):
+        return "Rate limit reached. Please try again in a minute."
+    return err
@@ -0,0 +1,21 @@
+"""Compact per-alert records for the sidebar queue's filter and sort."""
+from typing import NamedTuple
+
+
+class AlertFields(NamedTuple):
+    """The alert dict fields the queue filters and sorts on, as attributes."""
+    account_id: str
+    risk_level: str | None
+    fraud_probability: float
+    anomaly_score: float
+    outcome_adjusted_priority: float | None
+
+
+def alert_fields(alert: dict) -> AlertFields:
+    return AlertFields(
+        alert["account_id"],
+        alert.get("risk_level"),
+        alert["fraud_probability"],
+        alert.get("anomaly_score") or 0,
+        alert.get("outcome_adjusted_priority"),
+    )
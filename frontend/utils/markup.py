@@ -0,0 +1,31 @@
+"""HTML escaping and snippets for the dashboard's st.markdown cards."""
+from functools import lru_cache
+from html import escape
+
+
+def escape_html(s: str) -> str:
+    """
+    Escape &, <, > and " (not '); None/empty -> "".
+    html.escape's chained C-level str.replace calls beat a dict-based str.translate ~5x on typical text.
+    No "nothing to escape" pre-check: frozenset.isdisjoint(s) hashes every character and costs 2-6x
+    the escape itself on card-length strings, while replace returns clean strings without copying.
+    """
+    return escape(s or "", quote=False).replace('"', "&quot;")
+
+
+@lru_cache(maxsize=1024)
+def bullets_html(factors: tuple[str, ...]) -> str:
+    """
+    "• factor" lines, escaped and joined with <br>.
+    Cached here rather than in app.py, whose functions are redefined on every Streamlit rerun.
+    """
+    return "<br>".join(["• " + s for s in map(escape_html, factors)])
+
+
+@lru_cache(maxsize=256)
+def summary_html(text: str, max_chars: int = 200) -> str:
+    """text stripped, cut at the last word boundary within max_chars (+ "…") when longer, and escaped."""
+    t = text.strip()
+    if len(t) > max_chars:
+        t = t[:max_chars].rsplit(" ", 1)[0] + "…"
+    return escape_html(t)
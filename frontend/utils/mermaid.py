@@ -34,7 +34,7 @@ def mermaid_html(mermaid_code: str) -> str:
         '<div class="mermaid" style="min-height:200px;">'
         + mermaid_code
         + """</div>
-<script src="https://cdn.jsdelivr.net/npm/mermaid@9/dist/mermaid.min.js"></script>
+<script src="https://cdn.jsdelivr.net/npm/mermaid@10/dist/mermaid.min.js"></script>
 <script>
   mermaid.initialize({ startOnLoad: true, theme: 'neutral' });
 </script>"""